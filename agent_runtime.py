@@ -0,0 +1,271 @@
+import json
+import time
+import asyncio
+import hashlib
+import inspect
+import threading
+from collections import OrderedDict
+
+
+class NodeError(Exception):
+    pass
+
+
+class NodeMetrics:
+    def __init__(self, name):
+        self.name = name
+        self.status = "pending"
+        self.attempts = 0
+        self.seconds = 0.0
+        self.error = None
+        self.memoized = False
+        self.first_chunk_seconds = None
+        self.chunks = 0
+
+    def as_dict(self):
+        row = {
+            "node": self.name,
+            "status": self.status,
+            "attempts": self.attempts,
+            "seconds": round(self.seconds, 3),
+            "memoized": self.memoized,
+            "error": self.error,
+        }
+        if self.first_chunk_seconds is not None:
+            streaming = self.seconds - self.first_chunk_seconds
+            row["ttft_seconds"] = round(self.first_chunk_seconds, 3)
+            row["tokens_per_second"] = round(self.chunks / streaming, 1) if streaming > 0 and self.chunks > 1 else None
+        return row
+
+
+class Memo:
+    """Thread-safe LRU of node outputs keyed by node key and input values; shared across runs."""
+
+    def __init__(self, max_items=256):
+        self.max_items = max_items
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(node_key, args):
+        payload = json.dumps([node_key, list(args)], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return True, self._items[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+
+class Node:
+    def __init__(self, name, fn, deps=(), retries=0, backoff=0.5, timeout=None, memo_key=None, memoize=True, stream=False):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.memo_key = memo_key
+        self.memoize = memoize
+        self.stream = stream
+
+
+class RunResult:
+    def __init__(self, outputs, metrics, seconds):
+        self.outputs = outputs
+        self.metrics = metrics
+        self.seconds = seconds
+
+    @property
+    def ok(self):
+        return all(m.status in ("ok", "input") for m in self.metrics.values())
+
+    def errors(self):
+        return {name: m.error for name, m in self.metrics.items() if m.error}
+
+    def report(self):
+        return [m.as_dict() for m in self.metrics.values() if m.status != "input"]
+
+
+class Graph:
+    """
+    DAG of tool/agent calls. Each node's function receives its dependencies'
+    outputs positionally and may be sync (run in a worker thread) or async.
+    Nodes whose dependencies are done start immediately, so independent
+    branches run concurrently. A ToolResult with ok=False counts as a failure
+    and is retried with exponential backoff; dependents of a failed node are
+    skipped. With a Memo, a node called again with the same inputs is served
+    from it instead of re-running.
+    """
+
+    def __init__(self, memo=None, max_concurrency=None):
+        self.nodes = OrderedDict()
+        self.memo = memo
+        self.max_concurrency = max_concurrency
+
+    def add(self, name, fn, deps=(), retries=0, backoff=0.5, timeout=None, memo_key=None, memoize=True, stream=False):
+        """
+        Adds a node. `memo_key` identifies the computation in the memo (default:
+        the node name); include anything besides the inputs that changes the
+        result, such as the model. A `stream` node returns an iterator of text
+        chunks; they are passed to the run's `on_chunk` as they arrive and the
+        node's output is the joined text.
+        """
+        if name in self.nodes:
+            raise ValueError(f"Duplicate node: {name}")
+        self.nodes[name] = Node(name, fn, deps, retries, backoff, timeout, memo_key, memoize, stream)
+        return name
+
+    def _check(self, inputs):
+        for node in self.nodes.values():
+            for dep in node.deps:
+                if dep not in self.nodes and dep not in inputs:
+                    raise ValueError(f"Node {node.name} depends on unknown node or input {dep}")
+        visiting, done = set(), set()
+
+        def visit(name):
+            if name in done or name in inputs:
+                return
+            if name in visiting:
+                raise ValueError(f"Cycle through node {name}")
+            visiting.add(name)
+            for dep in self.nodes[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.nodes:
+            visit(name)
+
+    async def run_async(self, inputs=None, callback=None, on_chunk=None):
+        """
+        Runs the graph on `inputs` ({name: value}). `callback(metrics, output)`
+        is invoked on the event loop as each node finishes, and
+        `on_chunk(metrics, chunk)` for each chunk of a streaming node.
+        """
+        inputs = dict(inputs or {})
+        self._check(inputs)
+        outputs = dict(inputs)
+        metrics = OrderedDict()
+        for name in inputs:
+            metrics[name] = NodeMetrics(name)
+            metrics[name].status = "input"
+        for name in self.nodes:
+            metrics[name] = NodeMetrics(name)
+        finished = {name: asyncio.Event() for name in self.nodes}
+        semaphore = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
+        start = time.perf_counter()
+
+        async def execute(node):
+            for dep in node.deps:
+                if dep in finished:
+                    await finished[dep].wait()
+            metric = metrics[node.name]
+            failed = [dep for dep in node.deps if metrics[dep].status not in ("ok", "input")]
+            if failed:
+                metric.status = "skipped"
+                metric.error = f"Upstream failed: {', '.join(failed)}"
+            else:
+                args = [outputs[dep] for dep in node.deps]
+                if semaphore:
+                    async with semaphore:
+                        await self._call(node, args, metric, outputs, on_chunk)
+                else:
+                    await self._call(node, args, metric, outputs, on_chunk)
+            finished[node.name].set()
+            if callback:
+                callback(metric, outputs.get(node.name))
+
+        await asyncio.gather(*(execute(node) for node in self.nodes.values()))
+        return RunResult(outputs, metrics, time.perf_counter() - start)
+
+    async def _call(self, node, args, metric, outputs, on_chunk=None):
+        key = None
+        if self.memo is not None and node.memoize:
+            key = Memo.make_key(node.memo_key or node.name, args)
+            hit, value = self.memo.get(key)
+            if hit:
+                outputs[node.name] = value
+                metric.status = "ok"
+                metric.memoized = True
+                return
+
+        start = time.perf_counter()
+        for attempt in range(node.retries + 1):
+            metric.attempts = attempt + 1
+            try:
+                if node.stream:
+                    call = self._drain(node.fn(*args), metric, start, on_chunk)
+                elif inspect.iscoroutinefunction(node.fn):
+                    call = node.fn(*args)
+                else:
+                    call = asyncio.to_thread(node.fn, *args)
+                value = await asyncio.wait_for(call, node.timeout) if node.timeout else await call
+                if hasattr(value, "ok") and hasattr(value, "error"):
+                    if not value.ok:
+                        raise NodeError(value.error)
+                    value = value.output
+                outputs[node.name] = value
+                metric.status = "ok"
+                metric.error = None
+                if key is not None:
+                    self.memo.put(key, value)
+                break
+            except Exception as e:
+                metric.status = "failed"
+                metric.error = str(e) or type(e).__name__
+                if attempt < node.retries:
+                    await asyncio.sleep(node.backoff * 2 ** attempt)
+        metric.seconds = time.perf_counter() - start
+
+    @staticmethod
+    async def _drain(iterator, metric, start, on_chunk):
+        """Pulls a blocking chunk iterator in a worker thread, handing chunks to the loop as they arrive."""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        done = object()
+
+        def pump():
+            try:
+                for chunk in iterator:
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            else:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        worker = asyncio.ensure_future(asyncio.to_thread(pump))
+        chunks = []
+        metric.first_chunk_seconds = None
+        metric.chunks = 0
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                await worker
+                raise item
+            if metric.first_chunk_seconds is None:
+                metric.first_chunk_seconds = time.perf_counter() - start
+            metric.chunks += 1
+            chunks.append(item)
+            if on_chunk:
+                on_chunk(metric, item)
+        await worker
+        return "".join(chunks)
+
+    def run(self, inputs=None, callback=None, on_chunk=None):
+        return asyncio.run(self.run_async(inputs, callback, on_chunk))
@@ -1,52 +1,83 @@
 import os
+import io
 from dotenv import load_dotenv
 from langchain_classic.text_splitter import RecursiveCharacterTextSplitter
 from langchain_classic.document_loaders import PyPDFLoader
 import streamlit as st
 from langchain_classic.chains import conversational_retrieval
 import google.generativeai as genai
-from PyPDF2 import PdfReader
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_groq import ChatGroq
 from langchain_classic.vectorstores import FAISS
+from llm_cache import get_llm_cache
+from telemetry import get_telemetry, langchain_callbacks
+from ats_keywords import ResumeIndex, missing_keywords
+from ats_core import (
+    ANALYSES, build_analyze_all_prompt, build_prompt, extract_text_from_pdf, llm_json, llm_text, parse_analysis, text_hash,
+)
 load_dotenv()
 
 api_key = os.getenv("GOOGLE_API_KEY")
 genai.configure(api_key=api_key)
 
-model = ChatGroq(api_key=os.getenv("GROQ_API_KEY"))
+model = ChatGroq(api_key=os.getenv("GROQ_API_KEY"), callbacks=langchain_callbacks())
 
 st.set_page_config(page_title="AI Resume Analyzer")
 st.title("AI Resume Analyzer (Powered by Gemini)")
 
-def extract_text_from_pdf(uploaded_file):
-    """Extracts text from uploaded PDF"""
-    reader = PdfReader(uploaded_file)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() or ""
-    return text.strip()
+TITLES = {
+    "match": "Match Percentage",
+    "summary": "Resume Summary",
+    "missing_keywords": "Missing Keywords",
+    "suggestions": "Resume Improvement Suggestions",
+}
 
 def get_gemini_response(prompt):
-    """Helper to get Gemini model response"""
+    """Helper to get a response from the configured model"""
     try:
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        return get_llm_cache().get_or_call(
+            model.model_name, prompt, lambda: llm_text(model, prompt)
+        )
     except Exception as e:
         return f"Error: {e}"
-    
+
+@st.cache_data(show_spinner=False)
+def parse_resume(data: bytes, is_pdf: bool):
+    if is_pdf:
+        return extract_text_from_pdf(io.BytesIO(data))
+    return data.decode("utf-8")
+
+@st.cache_resource(show_spinner=False)
+def get_resume_index(resume_hash: str, _resume_text: str):
+    """Stemmed n-gram index of the resume, built once per resume."""
+    return ResumeIndex(_resume_text)
+
+@st.cache_data(show_spinner=False)
+def analyze_all(resume_hash: str, jd_hash: str, _resume_text: str, _job_description: str):
+    """One structured request for all four analyses, cached by (resume hash, JD hash)."""
+    prompt = build_analyze_all_prompt(_resume_text, _job_description)
+
+    def call():
+        text = llm_json(model, prompt)
+        # Raises on a malformed or truncated reply, so it is never cached and a retry calls the model again.
+        parse_analysis(text)
+        return text
+
+    text = get_llm_cache().get_or_call(model.model_name, prompt, call, generation_config={"response_format": "json"})
+    return parse_analysis(text)
+
 uploaded_resume = st.file_uploader("Upload your Resume (PDF/TXT)", type=["pdf", "txt"])
 job_description = st.text_area("Paste Job Description (optional)", placeholder="e.g. Data Scientist at XYZ...")
 
 if uploaded_resume:
-    if uploaded_resume.name.endswith(".pdf"):
-        resume_text = extract_text_from_pdf(uploaded_resume)
-    else:
-        resume_text = uploaded_resume.read().decode("utf-8")
+    resume_text = parse_resume(uploaded_resume.getvalue(), uploaded_resume.name.endswith(".pdf"))
+    key = (text_hash(resume_text), text_hash(job_description))
+    if "analyses" not in st.session_state:
+        st.session_state.analyses = {}
 
     st.success("Resume uploaded and processed successfully!")
 
-    col1, col2, col3, col4 = st.columns(4)
+    col1, col2, col3, col4, col5 = st.columns(5)
 
     with col1:
         match_btn = st.button("Match %")
@@ -56,68 +87,65 @@ if uploaded_resume:
         keywords_btn = st.button("Missing Keywords")
     with col4:
         improve_btn = st.button("Suggestions")
-
+    with col5:
+        all_btn = st.button("Analyze All")
+    narrative = st.checkbox("Add LLM narrative to missing keywords", value=False)
+
+    if all_btn:
+        with st.spinner("Running all analyses in one request..."):
+            try:
+                st.session_state.analyses[key] = analyze_all(key[0], key[1], resume_text, job_description)
+            except Exception as e:
+                st.error(f"Error: {e}")
+        analysis = st.session_state.analyses.get(key)
+        if analysis:
+            for kind in ANALYSES:
+                st.subheader(TITLES[kind])
+                st.write(analysis[kind])
+
+    requested = None
     if match_btn:
-        if not job_description:
-            st.warning("Please paste a job description to calculate match %.")
-        else:
-            with st.spinner("Calculating match percentage..."):
-                prompt = f"""
-                Compare the following resume and job description.
-                Return only the percentage match (0–100%) with one short justification.
-
-                Resume:
-                {resume_text[:6000]}
-
-                Job Description:
-                {job_description}
-                """
-                answer = get_gemini_response(prompt)
-            st.subheader("Match Percentage")
-            st.write(answer)
-
+        requested = "match"
     elif summary_btn:
-        with st.spinner("Summarizing resume..."):
-            prompt = f"""
-            Summarize the following resume in concise bullet points highlighting key skills, experience, and achievements.
-
-            Resume:
-            {resume_text[:6000]}
-            """
-            answer = get_gemini_response(prompt)
-        st.subheader("Resume Summary")
-        st.write(answer)
-
+        requested = "summary"
     elif keywords_btn:
-        if not job_description:
-            st.warning("Please paste a job description to find missing keywords.")
+        requested = "missing_keywords"
+    elif improve_btn:
+        requested = "suggestions"
+
+    if requested in ("match", "missing_keywords") and not job_description:
+        st.warning("Please paste a job description to calculate match %." if requested == "match"
+                   else "Please paste a job description to find missing keywords.")
+    elif requested == "missing_keywords":
+        st.subheader(TITLES[requested])
+        missing = missing_keywords(job_description, get_resume_index(key[0], resume_text))
+        if missing:
+            st.write(", ".join(missing))
         else:
-            with st.spinner("Finding missing keywords..."):
-                prompt = f"""
-                Compare the resume and job description.
-                List important keywords and skills mentioned in the job description but missing from the resume.
-
-                Resume:
-                {resume_text[:6000]}
-
-                Job Description:
-                {job_description}
-                """
-                answer = get_gemini_response(prompt)
-            st.subheader("Missing Keywords")
+            st.write("No missing keywords found.")
+        if narrative:
+            cached = st.session_state.analyses.get(key)
+            if cached and cached.get(requested):
+                answer = cached[requested]
+            else:
+                with st.spinner("Generating narrative..."):
+                    answer = get_gemini_response(build_prompt(requested, resume_text, job_description))
             st.write(answer)
-
-    elif improve_btn:
-        with st.spinner("Generating improvement suggestions..."):
-            prompt = f"""
-            Review the following resume.
-            Provide suggestions to improve it — focus on structure, language, measurable results, and formatting.
-
-            Resume:
-            {resume_text[:6000]}
-            """
-            answer = get_gemini_response(prompt)
-        st.subheader("Resume Improvement Suggestions")
+    elif requested:
+        cached = st.session_state.analyses.get(key)
+        if cached and cached.get(requested):
+            answer = cached[requested]
+        else:
+            with st.spinner(f"Generating {TITLES[requested].lower()}..."):
+                answer = get_gemini_response(build_prompt(requested, resume_text, job_description))
+        st.subheader(TITLES[requested])
         st.write(answer)
 else:
     st.info("👆 Please upload your resume to get started.")
+
+with st.sidebar.expander("LLM cache"):
+    st.json(get_llm_cache().stats())
+
+if get_telemetry().enabled:
+    with st.sidebar.expander("Telemetry"):
+        st.dataframe(get_telemetry().summary())
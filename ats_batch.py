@@ -0,0 +1,182 @@
+import os
+import csv
+import sys
+import json
+import math
+import time
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+from scipy import sparse
+
+from ats_core import STOPWORDS, build_prompt, extract_text_from_pdf, llm_text, tokenize
+
+RESUME_EXTENSIONS = (".pdf", ".txt")
+
+
+def parse_resume(path: str):
+    """Worker: reads one resume and returns (path, text, term counts, error)."""
+    try:
+        if path.lower().endswith(".pdf"):
+            text = extract_text_from_pdf(path)
+        else:
+            with open(path, encoding="utf-8", errors="ignore") as f:
+                text = f.read()
+    except Exception as e:
+        return path, "", Counter(), str(e)
+    terms = Counter(t for t in tokenize(text) if t not in STOPWORDS)
+    return path, text, terms, None
+
+
+def build_matrix(term_counts, vocabulary: dict):
+    """Builds a CSR document-term matrix with sublinear tf for terms in `vocabulary`."""
+    indptr, indices, data = [0], [], []
+    for counts in term_counts:
+        for term, count in counts.items():
+            column = vocabulary.get(term)
+            if column is not None:
+                indices.append(column)
+                data.append(1.0 + math.log(count))
+        indptr.append(len(indices))
+    return sparse.csr_matrix(
+        (np.asarray(data, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(term_counts), len(vocabulary)),
+    )
+
+
+def _l2_normalize(matrix):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags(1.0 / norms) @ matrix
+
+
+def score_resumes(term_counts, job_description: str, coverage_weight=0.4):
+    """
+    Scores every resume against the job description with TF-IDF cosine similarity
+    and job-description keyword coverage, all as sparse matrix operations.
+    Returns (score, tfidf, coverage) arrays.
+    """
+    jd_terms = Counter(t for t in tokenize(job_description) if t not in STOPWORDS)
+    vocabulary = {}
+    for counts in term_counts + [jd_terms]:
+        for term in counts:
+            vocabulary.setdefault(term, len(vocabulary))
+
+    docs = build_matrix(term_counts, vocabulary)
+    jd = build_matrix([jd_terms], vocabulary)
+
+    df = np.bincount(docs.indices, minlength=len(vocabulary))
+    idf = np.log((1 + docs.shape[0]) / (1 + df)).astype(np.float32) + 1.0
+    weighted = _l2_normalize(docs @ sparse.diags(idf))
+    jd_weighted = _l2_normalize(jd @ sparse.diags(idf))
+    tfidf = np.asarray((weighted @ jd_weighted.T).todense()).ravel()
+
+    jd_columns = np.asarray([vocabulary[t] for t in jd_terms], dtype=np.int64)
+    if len(jd_columns):
+        present = (docs[:, jd_columns] > 0).astype(np.float32)
+        coverage = np.asarray(present.sum(axis=1)).ravel() / len(jd_columns)
+    else:
+        coverage = np.zeros(docs.shape[0], dtype=np.float32)
+
+    score = (1 - coverage_weight) * tfidf + coverage_weight * coverage
+    return score, tfidf, coverage
+
+
+def rank(directory: str, job_description: str, top_k=10, workers=None, model=None, llm_workers=4):
+    """Parses, scores and ranks every resume in `directory`; only the top K go to the LLM."""
+    timings = {}
+    paths = sorted(
+        os.path.join(root, name)
+        for root, _, files in os.walk(directory)
+        for name in files
+        if name.lower().endswith(RESUME_EXTENSIONS)
+    )
+
+    start = time.perf_counter()
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        parsed = list(executor.map(parse_resume, paths, chunksize=max(1, len(paths) // (workers * 4) or 1)))
+    timings["parse"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    score, tfidf, coverage = score_resumes([p[2] for p in parsed], job_description)
+    order = np.argsort(-score)
+    timings["score"] = time.perf_counter() - start
+
+    rows = []
+    for position, i in enumerate(order, start=1):
+        path, text, _, error = parsed[i]
+        rows.append({
+            "rank": position,
+            "file": path,
+            "score": round(float(score[i]), 4),
+            "tfidf": round(float(tfidf[i]), 4),
+            "keyword_coverage": round(float(coverage[i]), 4),
+            "llm_match": None,
+            "error": error,
+            "_text": text,
+        })
+
+    start = time.perf_counter()
+    if model is not None and top_k:
+        from llm_cache import get_llm_cache
+
+        candidates = [row for row in rows if not row["error"]][:top_k]
+
+        def detailed_match(row):
+            prompt = build_prompt("match", row["_text"], job_description)
+            try:
+                return get_llm_cache().get_or_call(model.model_name, prompt, lambda: llm_text(model, prompt))
+            except Exception as e:
+                return f"Error: {e}"
+
+        with ThreadPoolExecutor(max_workers=llm_workers) as executor:
+            for row, answer in zip(candidates, executor.map(detailed_match, candidates)):
+                row["llm_match"] = answer
+    timings["llm"] = time.perf_counter() - start
+
+    for row in rows:
+        del row["_text"]
+    timings["resumes"] = len(paths)
+    timings["resumes_per_sec"] = len(paths) / (timings["parse"] + timings["score"]) if paths else 0.0
+    return rows, timings
+
+
+def write_results(rows, out_path: str):
+    if out_path.endswith(".csv"):
+        with open(out_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ["rank"])
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(out_path, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank a directory of resumes against one job description.")
+    parser.add_argument("resumes", help="Directory of PDF/TXT resumes")
+    parser.add_argument("--jd", required=True, help="Path to the job description text file")
+    parser.add_argument("--top-k", type=int, default=10, help="Candidates sent to the LLM for a detailed match")
+    parser.add_argument("--out", default="ranked.jsonl", help="Output path (.jsonl or .csv)")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: all cores)")
+    parser.add_argument("--no-llm", action="store_true", help="Only run the local prefilter")
+    args = parser.parse_args()
+
+    with open(args.jd, encoding="utf-8") as f:
+        job_description = f.read()
+
+    model = None
+    if not args.no_llm:
+        from dotenv import load_dotenv
+        from langchain_groq import ChatGroq
+
+        load_dotenv()
+        model = ChatGroq(api_key=os.getenv("GROQ_API_KEY"))
+
+    rows, timings = rank(args.resumes, job_description, args.top_k, args.workers, model)
+    write_results(rows, args.out)
+    print(json.dumps({k: round(v, 3) if isinstance(v, float) else v for k, v in timings.items()}), file=sys.stderr)
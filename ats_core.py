@@ -0,0 +1,124 @@
+import json
+import re
+import hashlib
+
+from PyPDF2 import PdfReader
+
+RESUME_CHARS = 6000
+ANALYSES = ("match", "summary", "missing_keywords", "suggestions")
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being but by can could did do does for from had has
+have having he her his how i if in into is it its may me more most must my no not of on or our out over own she
+should so some such than that the their them then there these they this those through to under up us very was we
+were what when where which while who will with would you your years year experience work working team strong
+ability able using use including etc well within across new role job candidate candidates required preferred plus
+""".split())
+
+
+def extract_text_from_pdf(uploaded_file):
+    """Extracts text from uploaded PDF"""
+    reader = PdfReader(uploaded_file)
+    return "".join(page.extract_text() or "" for page in reader.pages).strip()
+
+
+def text_hash(text: str):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def tokenize(text: str):
+    """Lowercased word tokens; keeps tech-style tokens such as c++, c#, node.js."""
+    return TOKEN_RE.findall(text.lower())
+
+
+def llm_text(model, prompt: str):
+    """Runs a prompt on either a LangChain chat model (ChatGroq) or a Gemini GenerativeModel."""
+    if hasattr(model, "invoke"):
+        return model.invoke(prompt).content.strip()
+    return model.generate_content(prompt).text.strip()
+
+
+def llm_json(model, prompt: str):
+    """Like llm_text, but asks the backend for JSON output where it supports it."""
+    if hasattr(model, "bind"):
+        return model.bind(response_format={"type": "json_object"}).invoke(prompt).content.strip()
+    if hasattr(model, "invoke"):
+        return model.invoke(prompt).content.strip()
+    return model.generate_content(prompt, generation_config={"response_mime_type": "application/json"}).text.strip()
+
+
+def build_prompt(kind: str, resume_text: str, job_description: str = ""):
+    resume = resume_text[:RESUME_CHARS]
+    if kind == "match":
+        return f"""
+                Compare the following resume and job description.
+                Return only the percentage match (0–100%) with one short justification.
+
+                Resume:
+                {resume}
+
+                Job Description:
+                {job_description}
+                """
+    if kind == "summary":
+        return f"""
+            Summarize the following resume in concise bullet points highlighting key skills, experience, and achievements.
+
+            Resume:
+            {resume}
+            """
+    if kind == "missing_keywords":
+        return f"""
+                Compare the resume and job description.
+                List important keywords and skills mentioned in the job description but missing from the resume.
+
+                Resume:
+                {resume}
+
+                Job Description:
+                {job_description}
+                """
+    if kind == "suggestions":
+        return f"""
+            Review the following resume.
+            Provide suggestions to improve it — focus on structure, language, measurable results, and formatting.
+
+            Resume:
+            {resume}
+            """
+    raise ValueError(f"Unknown analysis: {kind}")
+
+
+def build_analyze_all_prompt(resume_text: str, job_description: str = ""):
+    jd_note = (
+        f"Job Description:\n{job_description}"
+        if job_description
+        else "No job description was given: set \"match\" and \"missing_keywords\" to \"N/A\"."
+    )
+    return f"""
+    You are an applicant tracking system. Analyze the resume below and respond with a single JSON object
+    with exactly these string fields:
+    "match": the percentage match (0–100%) with the job description and one short justification,
+    "summary": concise bullet points highlighting key skills, experience, and achievements,
+    "missing_keywords": important keywords and skills in the job description that are missing from the resume,
+    "suggestions": suggestions to improve the resume (structure, language, measurable results, formatting).
+    Use markdown inside the strings where helpful. Return only the JSON object.
+
+    Resume:
+    {resume_text[:RESUME_CHARS]}
+
+    {jd_note}
+    """
+
+
+def parse_analysis(text: str):
+    """Parses the analyze-all response into {analysis: markdown}, tolerating code fences."""
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    data = json.loads(match.group(0) if match else text)
+    result = {}
+    for kind in ANALYSES:
+        value = data.get(kind, "")
+        if isinstance(value, list):
+            value = "\n".join(f"- {item}" for item in value)
+        result[kind] = str(value).strip()
+    return result
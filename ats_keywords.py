@@ -0,0 +1,219 @@
+import re
+import time
+from collections import Counter
+
+from ats_core import STOPWORDS
+
+SKILLS = """
+python; java; javascript; typescript; c++; c#; golang; rust; scala; kotlin; swift; ruby; php; matlab; bash; sql; nosql;
+html; css; react; angular; vue; node.js; django; flask; fastapi; spring boot; .net; graphql; rest api; microservices;
+postgresql; mysql; mongodb; redis; elasticsearch; kafka; rabbitmq; spark; hadoop; airflow; dbt; snowflake; bigquery;
+redshift; databricks; etl; data warehouse; data pipeline; data modeling; data analysis; data visualization; tableau;
+power bi; looker; excel; pandas; numpy; scikit-learn; tensorflow; pytorch; keras; machine learning; deep learning;
+natural language processing; computer vision; statistics; a/b testing; llm; generative ai; mlops; aws; azure; gcp;
+docker; kubernetes; terraform; ansible; jenkins; ci/cd; github actions; linux; git; agile; scrum; jira; devops;
+unit testing; test automation; selenium; security; networking; system design; distributed systems; cloud computing;
+project management; product management; stakeholder management; communication; leadership; mentoring;
+problem solving; budgeting; forecasting; financial modeling; accounting; sales; marketing; seo; content strategy;
+customer success; recruiting; figma; ux design; ui design
+"""
+ALIASES = {
+    "js": "javascript", "ts": "typescript", "k8s": "kubernetes", "postgres": "postgresql",
+    "ml": "machine learning", "dl": "deep learning", "nlp": "natural language processing",
+    "sklearn": "scikit-learn", "tf": "tensorflow", "gcp": "gcp", "google cloud": "gcp", "amazon web services": "aws",
+    "nodejs": "node.js", "node": "node.js", "reactjs": "react", "react.js": "react", "powerbi": "power bi",
+    "ci cd": "ci/cd", "cicd": "ci/cd", "restful": "rest api", "rest apis": "rest api", "genai": "generative ai",
+}
+# "go", "r" and "cv" are left out on purpose: in prose they are far more often
+# the verb, a stray letter ("R&D") or a résumé than the skill.
+PHRASE_RE = re.compile(r"[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z0-9]")
+
+
+def stem(word: str):
+    """Light suffix-stripping stemmer; enough to match plurals and verb forms."""
+    if len(word) <= 4 or not word.isalpha():
+        return word
+    for suffix, replacement in (("ies", "y"), ("ing", ""), ("ed", ""), ("es", ""), ("s", "")):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[: -len(suffix)] + replacement
+    return word
+
+
+def _base_terms(text: str):
+    """Tokenizes, applies single-word aliases and stems."""
+    words = []
+    for token in PHRASE_RE.findall(text.lower()):
+        alias = ALIASES.get(token)
+        words.extend(alias.split() if alias else [token])
+    return [stem(w) for w in words]
+
+
+MULTI_ALIASES = {tuple(_base_terms(a)): _base_terms(t) for a, t in ALIASES.items() if " " in a}
+MAX_ALIAS = max(len(k) for k in MULTI_ALIASES)
+
+
+def _terms(text: str):
+    """
+    Stemmed, aliased terms. Multi-word aliases are rewritten to their target
+    too, so "Google Cloud" in a job description and "GCP" in a resume meet
+    on the same canonical key.
+    """
+    terms = _base_terms(text)
+    out, i = [], 0
+    while i < len(terms):
+        for n in range(min(MAX_ALIAS, len(terms) - i), 1, -1):
+            target = MULTI_ALIASES.get(tuple(terms[i:i + n]))
+            if target:
+                out.extend(target)
+                i += n
+                break
+        else:
+            out.append(terms[i])
+            i += 1
+    return out
+
+
+def _phrase_key(phrase: str):
+    return " ".join(_terms(phrase))
+
+
+SKILL_KEYS = {}
+for _skill in (s.strip() for s in SKILLS.split(";")):
+    if _skill:
+        SKILL_KEYS[_phrase_key(_skill)] = _skill
+STEMMED_STOPWORDS = STOPWORDS | {stem(w) for w in STOPWORDS}
+MAX_NGRAM = max(len(key.split()) for key in SKILL_KEYS)
+
+
+def _ngrams(terms, n_max=MAX_NGRAM):
+    for n in range(1, n_max + 1):
+        for i in range(len(terms) - n + 1):
+            yield " ".join(terms[i:i + n])
+
+
+class ResumeIndex:
+    """Precomputed set of stemmed 1..n-grams in a resume for constant-time phrase lookups."""
+
+    def __init__(self, resume_text: str):
+        self.grams = frozenset(_ngrams(_terms(resume_text)))
+
+    def __contains__(self, key: str):
+        return key in self.grams
+
+
+def extract_keywords(job_description: str, max_terms=25):
+    """
+    Returns [(key, display)] for the job description: lexicon skills first, in
+    order of appearance, then other repeated non-stopword terms.
+    """
+    terms = _terms(job_description)
+    found = {}
+    for gram in _ngrams(terms):
+        if gram in SKILL_KEYS and gram not in found:
+            found[gram] = SKILL_KEYS[gram]
+
+    covered = {word for key in found for word in key.split()}
+    counts = Counter(
+        t for t in terms
+        if t not in covered and t not in STEMMED_STOPWORDS and len(t) > 2 and not t.isdigit()
+    )
+    for term, count in counts.most_common():
+        if len(found) >= max_terms:
+            break
+        if count >= 2:
+            found.setdefault(term, term)
+    return list(found.items())[:max_terms]
+
+
+def missing_keywords(job_description: str, resume):
+    """Job-description keywords absent from the resume (text or ResumeIndex)."""
+    index = resume if isinstance(resume, ResumeIndex) else ResumeIndex(resume)
+    return [display for key, display in extract_keywords(job_description) if key not in index]
+
+
+def _parse_llm_list(text: str):
+    items = []
+    for line in text.splitlines():
+        line = re.sub(r"^[\s*\-•\d.)]+", "", line).strip()
+        if not line or line.endswith(":"):
+            continue
+        items.extend(part.strip(" .*") for part in re.split(r"[,;]", line) if part.strip(" .*"))
+    return items
+
+
+def benchmark(samples, llm=None):
+    """
+    `samples` is a list of (resume_text, job_description, llm_output or None).
+    When llm_output is missing and `llm(prompt)` is given, it is called live.
+    Reports per-sample local/LLM latency and how many LLM keywords the local engine also found.
+    """
+    from ats_core import build_prompt
+
+    rows = []
+    for resume_text, job_description, llm_output in samples:
+        start = time.perf_counter()
+        local = missing_keywords(job_description, resume_text)
+        local_ms = (time.perf_counter() - start) * 1000
+
+        llm_ms = None
+        if llm_output is None and llm is not None:
+            start = time.perf_counter()
+            llm_output = llm(build_prompt("missing_keywords", resume_text, job_description))
+            llm_ms = (time.perf_counter() - start) * 1000
+
+        row = {"local_ms": round(local_ms, 3), "llm_ms": round(llm_ms, 1) if llm_ms else None, "local": local}
+        if llm_output is not None:
+            llm_keys = {_phrase_key(item) for item in _parse_llm_list(llm_output)}
+            local_keys = {_phrase_key(item) for item in local}
+            overlap = llm_keys & local_keys
+            row["llm_keywords"] = len(llm_keys)
+            row["recall_of_llm"] = round(len(overlap) / len(llm_keys), 3) if llm_keys else None
+            row["jaccard"] = round(len(overlap) / len(llm_keys | local_keys), 3) if llm_keys | local_keys else None
+        rows.append(row)
+    return rows
+
+
+if __name__ == "__main__":
+    import os
+    import json
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the local missing-keyword engine against LLM output.")
+    parser.add_argument("samples", help="Directory of NAME.resume.txt / NAME.jd.txt pairs, optionally NAME.llm.txt")
+    parser.add_argument("--live", action="store_true", help="Call the LLM when NAME.llm.txt is missing")
+    args = parser.parse_args()
+
+    def read(path):
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    samples = []
+    for name in sorted(os.listdir(args.samples)):
+        if not name.endswith(".resume.txt"):
+            continue
+        base = os.path.join(args.samples, name[: -len(".resume.txt")])
+        llm_path = base + ".llm.txt"
+        samples.append((read(base + ".resume.txt"), read(base + ".jd.txt"), read(llm_path) if os.path.exists(llm_path) else None))
+
+    llm = None
+    if args.live:
+        from dotenv import load_dotenv
+        from langchain_groq import ChatGroq
+        from ats_core import llm_text
+
+        load_dotenv()
+        model = ChatGroq(api_key=os.getenv("GROQ_API_KEY"))
+        llm = lambda prompt: llm_text(model, prompt)
+
+    rows = benchmark(samples, llm)
+    for row in rows:
+        print(json.dumps(row))
+    local = [r["local_ms"] for r in rows]
+    llm_times = [r["llm_ms"] for r in rows if r["llm_ms"]]
+    recalls = [r["recall_of_llm"] for r in rows if r.get("recall_of_llm") is not None]
+    print(json.dumps({
+        "samples": len(rows),
+        "mean_local_ms": round(sum(local) / len(local), 3) if local else None,
+        "mean_llm_ms": round(sum(llm_times) / len(llm_times), 1) if llm_times else None,
+        "mean_recall_of_llm": round(sum(recalls) / len(recalls), 3) if recalls else None,
+    }))
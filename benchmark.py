@@ -0,0 +1,624 @@
+"""
+Offline benchmark suite. Swaps the Gemini, Groq, OpenAI, embedding, YouTube and
+NewsAPI clients for deterministic local fakes and drives the core code paths
+headlessly, writing latency distributions, throughput, peak memory and call
+counts to JSON.
+
+    python benchmark.py --output before.json
+    python benchmark.py --output after.json --compare before.json
+"""
+import io
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import tempfile
+import threading
+import contextlib
+import subprocess
+import tracemalloc
+
+VOCABULARY = """
+revenue pipeline python model training data warehouse latency cache index query vector embedding transcript
+summary report analysis customer product market growth engineer cloud kubernetes docker airflow spark
+security budget forecast quarter team launch design research experiment metric dashboard benchmark
+""".split()
+
+
+class FakeServiceError(Exception):
+    pass
+
+
+class FakeBackend:
+    """
+    Deterministic stand-in for a remote model service: fixed base latency plus
+    seeded jitter, an optional output token rate and seeded failure injection.
+    Counts calls, failures and generated tokens.
+    """
+
+    def __init__(self, latency=0.05, jitter=0.0, tokens_per_second=0.0, failure_rate=0.0, output_tokens=60, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self.failure_rate = failure_rate
+        self.output_tokens = output_tokens
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.tokens = 0
+        self.prompt_chars = 0
+
+    def begin(self, prompt_chars=0):
+        """Registers a call, waits the base latency and raises if this call is chosen to fail."""
+        with self._lock:
+            self.calls += 1
+            self.prompt_chars += prompt_chars
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            fail = self._rng.random() < self.failure_rate
+            if fail:
+                self.failures += 1
+        time.sleep(delay)
+        if fail:
+            raise FakeServiceError("Injected failure")
+
+    def tokens_out(self, prompt, count=None):
+        """Deterministic output words for a prompt."""
+        count = count or self.output_tokens
+        rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+        words = [rng.choice(VOCABULARY) for _ in range(count)]
+        with self._lock:
+            self.tokens += count
+        return words
+
+    def token_delay(self):
+        if self.tokens_per_second:
+            time.sleep(1 / self.tokens_per_second)
+
+    def stats(self):
+        return {"calls": self.calls, "failures": self.failures, "tokens": self.tokens, "prompt_chars": self.prompt_chars}
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+        self.content = text
+
+
+def _default_responder(backend, prompt):
+    return " ".join(backend.tokens_out(prompt))
+
+
+class FakeGeminiModel:
+    """Quacks like google.generativeai.GenerativeModel (generate_content, stream=True)."""
+
+    def __init__(self, backend, responder=None, model_name="models/fake-gemini"):
+        self.backend = backend
+        self.responder = responder or _default_responder
+        self.model_name = model_name
+
+    def generate_content(self, contents, generation_config=None, stream=False):
+        prompt = contents if isinstance(contents, str) else " ".join(c for c in contents if isinstance(c, str))
+        self.backend.begin(len(prompt))
+        text = self.responder(self.backend, prompt)
+        if stream:
+            return self._stream(text)
+        for _ in text.split():
+            self.backend.token_delay()
+        return _Response(text)
+
+    def _stream(self, text):
+        for word in text.split(" "):
+            self.backend.token_delay()
+            yield _Response(word + " ")
+
+
+class FakeChatModel:
+    """Quacks like a LangChain chat model such as ChatGroq (invoke, bind)."""
+
+    def __init__(self, backend, responder=None, model_name="fake-groq"):
+        self.backend = backend
+        self.responder = responder or _default_responder
+        self.model_name = model_name
+
+    def bind(self, **kwargs):
+        return self
+
+    def invoke(self, prompt):
+        prompt = prompt if isinstance(prompt, str) else str(prompt)
+        self.backend.begin(len(prompt))
+        text = self.responder(self.backend, prompt)
+        for _ in text.split():
+            self.backend.token_delay()
+        return _Response(text)
+
+
+class FakeOpenAI:
+    """Quacks like the legacy openai module: openai.ChatCompletion.create(..., stream=...)."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.api_key = None
+        fake = self
+
+        class ChatCompletion:
+            @staticmethod
+            def create(model, messages, stream=False, **kwargs):
+                prompt = messages[-1]["content"]
+                fake.backend.begin(len(prompt))
+                words = fake.backend.tokens_out(prompt)
+                if stream:
+                    return fake._stream(words)
+                for _ in words:
+                    fake.backend.token_delay()
+                return {"choices": [{"message": {"role": "assistant", "content": " ".join(words)}}]}
+
+        self.ChatCompletion = ChatCompletion
+
+    def _stream(self, words):
+        for word in words:
+            self.backend.token_delay()
+            yield {"choices": [{"delta": {"content": word + " "}}]}
+
+
+class FakeEmbeddings:
+    """Hashing-trick embeddings with backend latency per batch; same text, same vector."""
+
+    def __init__(self, backend, dim=256):
+        self.backend = backend
+        self.dim = dim
+
+    def _vector(self, text):
+        vector = [0.0] * self.dim
+        for word in text.lower().split():
+            digest = hashlib.md5(word.encode("utf-8")).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.dim] += 1.0 if digest[4] & 1 else -1.0
+        norm = sum(v * v for v in vector) ** 0.5 or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts):
+        self.backend.begin(sum(len(t) for t in texts))
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text):
+        self.backend.begin(len(text))
+        return self._vector(text)
+
+
+class FakeYouTubeTranscriptApi:
+    """Quacks like youtube_transcript_api.YouTubeTranscriptApi.get_transcript."""
+
+    def __init__(self, backend, segments=400):
+        self.backend = backend
+        self.segments = segments
+
+    def get_transcript(self, video_id, languages=None):
+        self.backend.begin(len(video_id))
+        words = self.backend.tokens_out(video_id, self.segments * 8)
+        return [
+            {"start": i * 4.0, "duration": 4.0, "text": " ".join(words[i * 8:(i + 1) * 8])}
+            for i in range(self.segments)
+        ]
+
+
+def synthetic_text(words, seed=0):
+    rng = random.Random(seed)
+    sentences = []
+    for _ in range(words // 12):
+        sentence = " ".join(rng.choice(VOCABULARY) for _ in range(12))
+        sentences.append(sentence.capitalize() + ".")
+    return " ".join(sentences)
+
+
+def make_pdf(pages):
+    """Builds a minimal text-only PDF, one list of lines per page."""
+
+    def escape(line):
+        return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    objects = {
+        1: "<< /Type /Catalog /Pages 2 0 R >>",
+        3: "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    kids = []
+    next_id = 4
+    for lines in pages:
+        content = "BT /F1 9 Tf 11 TL 40 800 Td " + " ".join(f"({escape(line)}) Tj T*" for line in lines) + " ET"
+        objects[next_id + 1] = f"<< /Length {len(content)} >>\nstream\n{content}\nendstream"
+        objects[next_id] = (
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {next_id + 1} 0 R >>"
+        )
+        kids.append(f"{next_id} 0 R")
+        next_id += 2
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = out.tell()
+        out.write(f"{number} 0 obj\n{objects[number]}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for number in sorted(objects):
+        out.write(f"{offsets[number]:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+def _distribution(seconds):
+    if not seconds:
+        return {}
+    ordered = sorted(seconds)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000, 2)
+
+    return {
+        "count": len(ordered),
+        "min_ms": round(ordered[0] * 1000, 2),
+        "p50_ms": pick(0.5),
+        "p90_ms": pick(0.9),
+        "p99_ms": pick(0.99),
+        "max_ms": round(ordered[-1] * 1000, 2),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+    }
+
+
+class Scenario:
+    def __init__(self, name):
+        self.name = name
+        self.timings = {}
+        self.errors = 0
+        self.items = 0
+        self.backends = {}
+        self.extra = {}
+
+    @contextlib.contextmanager
+    def time(self, label):
+        """Records the block's latency under `label`; failed blocks only count as errors."""
+        start = time.perf_counter()
+        yield
+        self.timings.setdefault(label, []).append(time.perf_counter() - start)
+
+
+def run_scenario(name, body, iterations):
+    """Runs `body(scenario)` `iterations` times under tracemalloc and summarizes it."""
+    scenario = Scenario(name)
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        try:
+            with scenario.time("iteration"):
+                body(scenario)
+        except Exception as e:
+            scenario.errors += 1
+            scenario.extra.setdefault("last_error", f"{type(e).__name__}: {e}")
+    wall = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "iterations": iterations,
+        "errors": scenario.errors,
+        "wall_seconds": round(wall, 3),
+        "iterations_per_second": round(iterations / wall, 2) if wall else None,
+        "items_per_second": round(scenario.items / wall, 2) if wall and scenario.items else None,
+        "peak_python_memory_mb": round(peak / 1e6, 2),
+        "latency": {label: _distribution(values) for label, values in scenario.timings.items()},
+        "calls": {label: backend.stats() for label, backend in scenario.backends.items()},
+        **scenario.extra,
+    }
+
+
+def bench_summarizer(args):
+    from summarizer import summarize_text
+
+    backend = FakeBackend(args.latency, args.jitter, args.token_rate, args.failure_rate, seed=args.seed)
+    model = FakeGeminiModel(backend)
+    text = synthetic_text(args.transcript_words, args.seed)
+
+    def body(scenario):
+        scenario.backends["gemini"] = backend
+        with scenario.time("summarize_text"):
+            summarize_text(text, model)
+        scenario.items += 1
+
+    return run_scenario("summarizer", body, args.iterations)
+
+
+def bench_document_qa(args):
+    from langchain_classic.text_splitter import RecursiveCharacterTextSplitter
+    from embedding_store import CachedEmbeddings, EmbeddingStore
+    from pdf_ingest import ingest_pdf
+    from hybrid_retriever import BM25Index, HybridRetriever, documents_from_store
+
+    embed_backend = FakeBackend(args.latency / 2, args.jitter, 0, args.failure_rate, seed=args.seed)
+    llm_backend = FakeBackend(args.latency, args.jitter, args.token_rate, args.failure_rate, seed=args.seed + 1)
+    llm = FakeChatModel(llm_backend)
+    rng = random.Random(args.seed)
+    words = synthetic_text(args.pdf_pages * 400, args.seed).split()
+    pages = [[" ".join(words[p * 400 + i:p * 400 + i + 14]) for i in range(0, 400, 14)] for p in range(args.pdf_pages)]
+    pdf = make_pdf(pages)
+    questions = [" ".join(rng.choice(VOCABULARY) for _ in range(5)) + "?" for _ in range(args.queries)]
+
+    def body(scenario):
+        scenario.backends["embeddings"] = embed_backend
+        scenario.backends["llm"] = llm_backend
+        with tempfile.TemporaryDirectory() as root:
+            embeddings = CachedEmbeddings(FakeEmbeddings(embed_backend), "fake-embedding", EmbeddingStore("fake-embedding", root=root))
+            splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=150)
+            with scenario.time("ingest"):
+                store, timings = ingest_pdf(pdf, embeddings, splitter)
+            scenario.extra["chunks"] = timings["chunks"]
+            retriever = HybridRetriever(vector_store=store, bm25=BM25Index(documents_from_store(store)), k=4)
+            for question in questions:
+                with scenario.time("query"):
+                    docs = retriever.invoke(question)
+                    context = "\n\n".join(d.page_content for d in docs)
+                    llm.invoke(f"Answer using the context.\n\n{context}\n\nQuestion: {question}")
+                scenario.items += 1
+            embeddings.store.conn.close()
+
+    return run_scenario("document_qa", body, args.iterations)
+
+
+SQL_QUESTIONS = {
+    "average salary per department": "SELECT department, AVG(salary) FROM employees GROUP BY department",
+    "top earners": "SELECT name, salary FROM employees ORDER BY salary DESC LIMIT 20",
+    "engineering headcount": "SELECT COUNT(*) FROM employees WHERE department = 'Engineering'",
+    "salary history of employee 42": "SELECT * FROM salary_history WHERE employee_id = 42",
+    "hires since 2020": "SELECT name, hire_date FROM employees WHERE hire_date >= '2020-01-01'",
+}
+
+
+def _sql_responder(backend, prompt):
+    for question, sql in SQL_QUESTIONS.items():
+        if f"Question: {question}" in prompt:
+            return f"```sql\n{sql}\n```"
+    return "SELECT 1"
+
+
+def bench_sql(args):
+    import sql
+    from sql_engine import SQLEngine
+    from sql_guard import QueryGuard
+    from result_cache import ResultCache, run_cached_query
+
+    backend = FakeBackend(args.latency, args.jitter, 0, args.failure_rate, seed=args.seed)
+    model = FakeGeminiModel(backend, _sql_responder)
+    workdir = tempfile.mkdtemp(prefix="bench_sql_")
+    db_path = os.path.join(workdir, "company.db")
+    with contextlib.redirect_stdout(io.StringIO()):
+        sql.generate(db_path, args.employees, 2, args.seed)
+    engine = SQLEngine(db_path)
+    guard = QueryGuard(engine, log_path=os.path.join(workdir, "guard.db"))
+    result_cache = ResultCache(db_path)
+
+    def body(scenario):
+        scenario.backends["gemini"] = backend
+        for question in SQL_QUESTIONS:
+            with scenario.time("translate"):
+                query, _ = engine.translate(question, lambda prompt: model.generate_content(prompt).text)
+            with scenario.time("guard"):
+                checked = guard.check(query)
+            with scenario.time("run_sql_query"):
+                stream, _ = run_cached_query(engine, result_cache, checked.sql)
+                stream.close()
+            scenario.items += 1
+        scenario.extra["engine"] = engine.stats()
+        scenario.extra["result_cache"] = result_cache.stats()
+
+    return run_scenario("sql", body, args.iterations)
+
+
+def _ats_responder(backend, prompt):
+    if "single JSON object" in prompt:
+        return json.dumps({kind: " ".join(backend.tokens_out(prompt + kind, 20)) for kind in
+                           ("match", "summary", "missing_keywords", "suggestions")})
+    return _default_responder(backend, prompt)
+
+
+def bench_ats(args):
+    from ats_core import ANALYSES, build_analyze_all_prompt, build_prompt, llm_json, llm_text, parse_analysis
+    from ats_keywords import ResumeIndex, missing_keywords
+
+    backend = FakeBackend(args.latency, args.jitter, args.token_rate, args.failure_rate, seed=args.seed)
+    model = FakeChatModel(backend, _ats_responder)
+    resume = synthetic_text(600, args.seed)
+    job_description = synthetic_text(200, args.seed + 1) + " Requirements: Python, SQL, Airflow, Kubernetes, Terraform."
+
+    def body(scenario):
+        scenario.backends["groq"] = backend
+        with scenario.time("four_prompts"):
+            for kind in ANALYSES:
+                llm_text(model, build_prompt(kind, resume, job_description))
+        with scenario.time("analyze_all"):
+            parse_analysis(llm_json(model, build_analyze_all_prompt(resume, job_description)))
+        with scenario.time("local_missing_keywords"):
+            missing_keywords(job_description, ResumeIndex(resume))
+        scenario.items += 1
+
+    return run_scenario("ats", body, args.iterations)
+
+
+def _llm_tool(backend, system_prompt):
+    from crew_tools import LLMTool
+
+    tool = LLMTool(api_key="fake", system_prompt=system_prompt)
+    tool.openai = FakeOpenAI(backend)
+    return tool
+
+
+def bench_news_crew(args):
+    """The news crew's research -> report graph against a local stub NewsAPI server."""
+    import openai  # LLMTool imports it lazily; fail here so a missing package counts as skipped
+    from agent_runtime import Graph
+    from crew_tools import NewsSearchTool, make_stub_news_handler, serve_stub
+
+    backend = FakeBackend(args.latency, args.jitter, args.token_rate, args.failure_rate, seed=args.seed)
+    server = serve_stub(make_stub_news_handler(args.latency))
+    endpoint = f"http://127.0.0.1:{server.server_port}/v2/everything"
+    topics = ",".join(VOCABULARY[:args.topics])
+
+    def body(scenario):
+        scenario.backends["openai"] = backend
+        # A fresh tool per iteration so every run really fetches.
+        news_tool = NewsSearchTool(api_key="stub", endpoint=endpoint, ttl_seconds=0)
+        writer = _llm_tool(backend, "You are a professional journalist.")
+        graph = Graph()
+        graph.add("research", lambda topic: news_tool.run_many(topic.split(",")), deps=["topic"], retries=2, backoff=0.01)
+        graph.add("report", lambda data, topic: writer.run(f"Report on {topic}:\n{data}"), deps=["research", "topic"],
+                  retries=1, backoff=0.01)
+        with scenario.time("pipeline"):
+            run = graph.run({"topic": topics})
+        if not run.ok:
+            raise RuntimeError(run.errors())
+        for row in run.report():
+            scenario.timings.setdefault(row["node"], []).append(row["seconds"])
+        scenario.items += 1
+        scenario.extra["news_fetch"] = news_tool.stats()
+
+    try:
+        return run_scenario("news_crew", body, args.iterations)
+    finally:
+        server.shutdown()
+
+
+def bench_blog_crew(args):
+    """The blog crew's transcript fan-out -> blog graph with a fake transcript API."""
+    import openai  # see bench_news_crew
+    import transcript_store
+    from agent_runtime import Graph
+    from crew_tools import YouTubeTranscriptTool
+
+    llm_backend = FakeBackend(args.latency, args.jitter, args.token_rate, args.failure_rate, seed=args.seed)
+    youtube_backend = FakeBackend(args.latency, args.jitter, 0, args.failure_rate, seed=args.seed + 1)
+    transcript_store.YouTubeTranscriptApi = FakeYouTubeTranscriptApi(youtube_backend)
+    workdir = tempfile.mkdtemp(prefix="bench_blog_")
+    urls = [f"https://www.youtube.com/watch?v={hashlib.md5(str(i).encode()).hexdigest()[:11]}" for i in range(args.videos)]
+
+    def body(scenario):
+        scenario.backends["openai"] = llm_backend
+        scenario.backends["youtube"] = youtube_backend
+        # A fresh transcript store per iteration so every run really fetches.
+        transcript_store._default_store = transcript_store.TranscriptStore(
+            path=os.path.join(workdir, f"transcripts_{time.monotonic_ns()}.db")
+        )
+        transcript_tool = YouTubeTranscriptTool()
+        writer = _llm_tool(llm_backend, "Write an engaging blog post.")
+        graph = Graph()
+        transcripts = [
+            graph.add(f"transcript_{i + 1}", transcript_tool.run, deps=[f"url_{i + 1}"], retries=2, backoff=0.01)
+            for i in range(len(urls))
+        ]
+        graph.add("blog", lambda *texts: writer.run("Blog:\n" + "\n---\n".join(texts)), deps=transcripts,
+                  retries=1, backoff=0.01)
+        with scenario.time("pipeline"):
+            run = graph.run({f"url_{i + 1}": url for i, url in enumerate(urls)})
+        if not run.ok:
+            raise RuntimeError(run.errors())
+        scenario.items += 1
+
+    return run_scenario("blog_crew", body, args.iterations)
+
+
+SCENARIOS = {
+    "summarizer": bench_summarizer,
+    "document_qa": bench_document_qa,
+    "sql": bench_sql,
+    "ats": bench_ats,
+    "news_crew": bench_news_crew,
+    "blog_crew": bench_blog_crew,
+}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(current, baseline):
+    """Per-scenario, per-label p50 change against a baseline report (positive = slower)."""
+    rows = []
+    for name, result in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base or "latency" not in result or "latency" not in base:
+            continue
+        for label, dist in result["latency"].items():
+            before = base["latency"].get(label, {}).get("p50_ms")
+            after = dist.get("p50_ms")
+            if before and after is not None:
+                rows.append({
+                    "scenario": name,
+                    "stage": label,
+                    "baseline_p50_ms": before,
+                    "p50_ms": after,
+                    "change_pct": round((after - before) / before * 100, 1),
+                })
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Offline benchmarks with deterministic fake backends.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.05, help="Base latency per fake service call (s)")
+    parser.add_argument("--jitter", type=float, default=0.01, help="Extra uniform random latency per call (s)")
+    parser.add_argument("--token-rate", type=float, default=0.0, help="Fake output tokens per second; 0 = instant")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Probability that a fake call fails")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--transcript-words", type=int, default=30000)
+    parser.add_argument("--pdf-pages", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("--employees", type=int, default=50000)
+    parser.add_argument("--videos", type=int, default=4)
+    parser.add_argument("--topics", type=int, default=3)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="Baseline JSON report to compare p50 latencies against")
+    args = parser.parse_args()
+
+    # Keep every on-disk cache out of the working tree and measure the uncached paths.
+    cache_root = tempfile.mkdtemp(prefix="bench_cache_")
+    os.environ.setdefault("LLM_CACHE_DISABLED", "1")
+    os.environ.setdefault("LLM_CACHE_PATH", os.path.join(cache_root, "llm_cache.db"))
+    os.environ.setdefault("EMBEDDING_STORE_DIR", os.path.join(cache_root, "embeddings"))
+    os.environ.setdefault("SQL_GUARD_LOG", os.path.join(cache_root, "sql_guard.db"))
+    os.environ.setdefault("TRANSCRIPT_CACHE_PATH", os.path.join(cache_root, "transcripts.db"))
+    os.environ.setdefault("INDEX_CACHE_DIR", os.path.join(cache_root, "faiss"))
+
+    report = {
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "config": vars(args),
+        "scenarios": {},
+    }
+    for name in [n.strip() for n in args.scenarios.split(",") if n.strip()]:
+        if name not in SCENARIOS:
+            parser.error(f"Unknown scenario: {name}")
+        print(f"running {name}...", file=sys.stderr)
+        try:
+            report["scenarios"][name] = SCENARIOS[name](args)
+        except ImportError as e:
+            report["scenarios"][name] = {"skipped": f"missing dependency: {e}"}
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            report["comparison"] = compare(report, json.load(f))
+
+    text = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"wrote {args.output}", file=sys.stderr)
+    else:
+        print(text)
@@ -0,0 +1,72 @@
+import os
+import time
+
+
+def estimate_tokens(text: str):
+    """Rough token estimate (~4 characters per token) that needs no tokenizer or API call."""
+    return max(1, len(text) // 4)
+
+
+class ChatSession:
+    """
+    Long-lived Gemini chat for one Streamlit session. The chat object is kept
+    between messages, the history sent with each turn is capped by a token
+    budget, and older turns are folded into a rolling summary.
+    """
+
+    def __init__(self, model, token_budget=None, keep_recent=6):
+        self.model = model
+        self.token_budget = token_budget or int(os.getenv("CHAT_TOKEN_BUDGET", "6000"))
+        self.keep_recent = keep_recent
+        self.summary = ""
+        self.turns = []
+        self.metrics = []
+        self.chat = model.start_chat(history=[])
+
+    def _history(self):
+        history = []
+        if self.summary:
+            history.append({"role": "user", "parts": [f"Summary of our conversation so far:\n{self.summary}"]})
+            history.append({"role": "model", "parts": ["Understood, I'll keep that in mind."]})
+        history.extend({"role": t["role"], "parts": [t["text"]]} for t in self.turns)
+        return history
+
+    def history_tokens(self):
+        return estimate_tokens(self.summary) + sum(estimate_tokens(t["text"]) for t in self.turns)
+
+    def _compact(self):
+        """Summarizes all but the most recent turns once the history exceeds the budget."""
+        if self.history_tokens() <= self.token_budget or len(self.turns) <= self.keep_recent:
+            return
+        old, self.turns = self.turns[:-self.keep_recent], self.turns[-self.keep_recent:]
+        transcript = "\n".join(f"{t['role']}: {t['text']}" for t in old)
+        prompt = (
+            "Update the running summary of a conversation with the new turns below. "
+            "Keep facts, names, decisions and open questions; be concise.\n\n"
+            f"Current summary:\n{self.summary or '(none)'}\n\nNew turns:\n{transcript}"
+        )
+        self.summary = self.model.generate_content(prompt, generation_config={"temperature": 0.2}).text
+        self.chat = self.model.start_chat(history=self._history())
+
+    def send_stream(self, user_text: str):
+        """Sends one user turn and yields the reply text as it streams in."""
+        self._compact()
+        request_tokens = self.history_tokens() + estimate_tokens(user_text)
+        start = time.perf_counter()
+        first_token = None
+        parts = []
+        for chunk in self.chat.send_message(user_text, stream=True):
+            text = chunk.text
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            parts.append(text)
+            yield text
+
+        answer = "".join(parts)
+        self.turns.append({"role": "user", "text": user_text})
+        self.turns.append({"role": "model", "text": answer})
+        self.metrics.append({
+            "ttft": first_token,
+            "total": time.perf_counter() - start,
+            "request_tokens": request_tokens,
+        })
@@ -0,0 +1,253 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections.abc import Mapping
+
+import numpy as np
+import faiss
+from langchain_core.documents import Document
+from langchain_community.docstore.base import Docstore
+from langchain_classic.vectorstores import FAISS
+
+from pdf_ingest import embed_pdf_batches
+from telemetry import peak_rss_mb
+
+
+class SQLiteDocstore(Docstore):
+    """Read-only docstore view over the corpus chunk table."""
+
+    def __init__(self, conn, lock):
+        self.conn = conn
+        self.lock = lock
+
+    def search(self, search):
+        with self.lock:
+            row = self.conn.execute("SELECT text, metadata FROM chunks WHERE id = ?", (int(search),)).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return Document(page_content=row[0], metadata=json.loads(row[1]))
+
+
+class _LabelMap(Mapping):
+    """FAISS labels are the chunk ids, so the label -> docstore id mapping is the identity."""
+
+    def __init__(self, index):
+        self.index = index
+
+    def __getitem__(self, label):
+        return int(label)
+
+    def __iter__(self):
+        return iter(faiss.vector_to_array(self.index.id_map).tolist())
+
+    def __len__(self):
+        return self.index.ntotal
+
+
+class _CorpusFAISS(FAISS):
+    """
+    LangChain FAISS view over a corpus. Each search takes the corpus lock and
+    uses the index current at that moment, so it never sees an index being
+    swapped out or chunk ids whose rows were just deleted.
+    """
+
+    def __init__(self, corpus, embeddings):
+        super().__init__(
+            embedding_function=embeddings,
+            index=corpus.index,
+            docstore=SQLiteDocstore(corpus.conn, corpus._lock),
+            index_to_docstore_id=_LabelMap(corpus.index),
+        )
+        self.corpus = corpus
+
+    def _use_current_index(self):
+        if self.index is not self.corpus.index:
+            self.index = self.corpus.index
+            self.index_to_docstore_id = _LabelMap(self.index)
+
+    def similarity_search_with_score_by_vector(self, *args, **kwargs):
+        with self.corpus._lock:
+            self._use_current_index()
+            return super().similarity_search_with_score_by_vector(*args, **kwargs)
+
+    def max_marginal_relevance_search_with_score_by_vector(self, *args, **kwargs):
+        with self.corpus._lock:
+            self._use_current_index()
+            return super().max_marginal_relevance_search_with_score_by_vector(*args, **kwargs)
+
+
+class Corpus:
+    """
+    Persistent multi-document corpus. Chunks are stored in an ID-mapped FAISS
+    index keyed by their SQLite row id, so documents can be added or removed
+    without rebuilding or re-embedding the rest of the corpus. Writers update a
+    copy of the index and swap it in under the lock, so searches never run
+    against an index that is being mutated.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("CORPUS_DIR", os.path.join(".cache", "corpus"))
+        os.makedirs(self.path, exist_ok=True)
+        self.index_path = os.path.join(self.path, "index.faiss")
+        self._lock = threading.RLock()
+
+        start = time.perf_counter()
+        self.conn = sqlite3.connect(os.path.join(self.path, "corpus.db"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA mmap_size=268435456")
+        self.conn.executescript("""
+        CREATE TABLE IF NOT EXISTS documents (
+            doc_id TEXT PRIMARY KEY,
+            name TEXT,
+            chunks INTEGER,
+            added_at REAL
+        );
+        CREATE TABLE IF NOT EXISTS chunks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            doc_id TEXT NOT NULL,
+            text TEXT NOT NULL,
+            metadata TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_chunks_doc_id ON chunks (doc_id);
+        """)
+        self.index = None
+        self._mmapped = False
+        if os.path.exists(self.index_path):
+            try:
+                self.index = faiss.read_index(self.index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+                self._mmapped = True
+            except RuntimeError:
+                self.index = faiss.read_index(self.index_path)
+        self.load_seconds = time.perf_counter() - start
+
+    def _index_copy(self, dim: int):
+        """Writable copy of the current index (or a new empty one) to apply a change to."""
+        if self.index is None:
+            return faiss.IndexIDMap2(faiss.IndexFlatL2(dim))
+        if self._mmapped:
+            # A memory-mapped index is read-only; the saved file is already an independent copy.
+            return faiss.read_index(self.index_path)
+        return faiss.clone_index(self.index)
+
+    def _save_index(self, index):
+        tmp_path = f"{self.index_path}.tmp"
+        faiss.write_index(index, tmp_path)
+        os.replace(tmp_path, self.index_path)
+
+    def _swap_index(self, index):
+        self.index = index
+        self._mmapped = False
+
+    def documents(self):
+        with self._lock:
+            rows = self.conn.execute("SELECT doc_id, name, chunks, added_at FROM documents ORDER BY added_at").fetchall()
+        return [{"doc_id": r[0], "name": r[1], "chunks": r[2], "added_at": r[3]} for r in rows]
+
+    def all_documents(self):
+        """Returns every chunk in the corpus as a Document, in id order."""
+        with self._lock:
+            rows = self.conn.execute("SELECT text, metadata FROM chunks ORDER BY id").fetchall()
+        return [Document(page_content=text, metadata=json.loads(metadata)) for text, metadata in rows]
+
+    def version(self):
+        """Changes whenever chunks are added or removed."""
+        with self._lock:
+            return tuple(self.conn.execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM chunks").fetchone())
+
+    def add_pdf(self, name: str, data: bytes, embeddings, splitter):
+        """
+        Embeds and inserts a PDF's chunks. Returns the document id, or None if the
+        same bytes are already in the corpus. Raises ValueError if no text could
+        be extracted.
+        """
+        doc_id = hashlib.sha256(data).hexdigest()
+        if self._has_document(doc_id):
+            return None
+
+        # Embedding makes network calls, so it runs without holding the lock.
+        batches = list(embed_pdf_batches(data, embeddings, splitter, {}, source=name))
+        if not batches:
+            raise ValueError("No text could be extracted from the PDF.")
+
+        with self._lock:
+            if self._has_document(doc_id):
+                return None
+            index = self._index_copy(batches[0][1].shape[1])
+            total = 0
+            try:
+                for batch, matrix in batches:
+                    ids = []
+                    for doc in batch:
+                        cursor = self.conn.execute(
+                            "INSERT INTO chunks (doc_id, text, metadata) VALUES (?, ?, ?)",
+                            (doc_id, doc.page_content, json.dumps(doc.metadata)),
+                        )
+                        ids.append(cursor.lastrowid)
+                    index.add_with_ids(np.ascontiguousarray(matrix), np.asarray(ids, dtype=np.int64))
+                    total += len(ids)
+
+                self.conn.execute(
+                    "INSERT INTO documents (doc_id, name, chunks, added_at) VALUES (?, ?, ?, ?)",
+                    (doc_id, name, total, time.time()),
+                )
+                self._save_index(index)
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+            self._swap_index(index)
+        return doc_id
+
+    def _has_document(self, doc_id: str):
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM documents WHERE doc_id = ?", (doc_id,)).fetchone() is not None
+
+    def remove(self, doc_id: str):
+        """Deletes a document's chunks from the index and the docstore."""
+        with self._lock:
+            ids = [r[0] for r in self.conn.execute("SELECT id FROM chunks WHERE doc_id = ?", (doc_id,))]
+            index = None
+            try:
+                if ids and self.index is not None:
+                    index = self._index_copy(self.index.d)
+                    index.remove_ids(np.asarray(ids, dtype=np.int64))
+                    self._save_index(index)
+                self.conn.execute("DELETE FROM chunks WHERE doc_id = ?", (doc_id,))
+                self.conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+            if index is not None:
+                self._swap_index(index)
+
+    def as_vector_store(self, embeddings):
+        """Wraps the corpus as a LangChain FAISS store, or returns None while it is empty."""
+        with self._lock:
+            if self.index is None or self.index.ntotal == 0:
+                return None
+            return _CorpusFAISS(self, embeddings)
+
+    def stats(self):
+        with self._lock:
+            chunk_count = self.conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        return {
+            "documents": len(self.documents()),
+            "chunks": chunk_count,
+            "load_seconds": round(self.load_seconds, 4),
+            "index_bytes": os.path.getsize(self.index_path) if os.path.exists(self.index_path) else 0,
+            "index_mmapped": self._mmapped,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Report load time and memory for a saved corpus.")
+    parser.add_argument("--path", default=None)
+    args = parser.parse_args()
+    print(json.dumps(Corpus(args.path).stats(), indent=2))
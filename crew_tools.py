@@ -0,0 +1,393 @@
+import os
+import re
+import json
+import time
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from llm_cache import get_llm_cache
+from telemetry import payload_bytes, percentile, span
+
+
+class ToolResult:
+    def __init__(self, ok, output=None, error=None):
+        self.ok = ok
+        self.output = output
+        self.error = error
+
+
+def format_articles(articles):
+    return "\n\n".join(
+        f"Title: {a.get('title')}\nSource: {(a.get('source') or {}).get('name')}\nURL: {a.get('url')}\nDescription: {a.get('description')}\n"
+        for a in articles
+    )
+
+
+def _url_key(url):
+    return (url or "").split("#")[0].rstrip("/").lower()
+
+
+class NewsSearchTool:
+    """
+    NewsAPI client on a pooled keep-alive session with timeouts. Responses are
+    cached per (topic, language, page size) for `ttl_seconds`; stale entries are
+    revalidated with If-None-Match / If-Modified-Since so a 304 costs no body.
+    The endpoint can be pointed at a local stub server via NEWS_API_ENDPOINT.
+    """
+
+    def __init__(self, api_key=None, endpoint=None, timeout=None, ttl_seconds=None, max_workers=None, max_entries=256):
+        self.api_key = api_key or os.getenv("NEWS_API_KEY")
+        self.endpoint = endpoint or os.getenv("NEWS_API_ENDPOINT", "https://newsapi.org/v2/everything")
+        self.timeout = timeout or float(os.getenv("NEWS_API_TIMEOUT", "10"))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("NEWS_CACHE_TTL_MINUTES", "15")) * 60
+        self.max_workers = max_workers or int(os.getenv("NEWS_FETCH_WORKERS", "4"))
+        self.max_entries = max_entries
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._latencies = deque(maxlen=1000)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def search(self, topic, language="en", max_articles=5):
+        """Returns the article dicts for a topic; raises on HTTP or API errors."""
+        key = (" ".join(topic.lower().split()), language, max_articles)
+        now = time.time()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and now - entry["fetched_at"] < self.ttl_seconds:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return entry["articles"]
+
+        headers = {"X-Api-Key": self.api_key}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        params = {"q": topic, "sortBy": "publishedAt", "language": language, "pageSize": max_articles}
+
+        start = time.perf_counter()
+        with span("http", "newsapi", cache="revalidate" if entry is not None else "miss") as s:
+            response = self.session.get(self.endpoint, params=params, headers=headers, timeout=self.timeout)
+            s.set(status=response.status_code, bytes_out=len(response.content))
+            if response.status_code == 304:
+                s.set(cache="hit")
+        with self._lock:
+            self._latencies.append(time.perf_counter() - start)
+
+        if response.status_code == 304 and entry is not None:
+            with self._lock:
+                entry["fetched_at"] = now
+                self._cache.move_to_end(key)
+                self.revalidated += 1
+            return entry["articles"]
+
+        data = response.json()
+        if data.get("status") != "ok":
+            raise RuntimeError(data.get("message", f"HTTP {response.status_code}"))
+        articles = data.get("articles", [])
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = {
+                "articles": articles,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "fetched_at": now,
+            }
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return articles
+
+    def run(self, topic, language="en", max_articles=5):
+        if not self.api_key:
+            return ToolResult(False, error="Missing NEWS_API_KEY.")
+        try:
+            articles = self.search(topic, language, max_articles)
+            if not articles:
+                return ToolResult(False, error="No articles found.")
+            return ToolResult(True, format_articles(articles))
+        except Exception as e:
+            return ToolResult(False, error=str(e))
+
+    def run_many(self, topics, language="en", max_articles=5):
+        """Fetches several topics concurrently and merges the articles, dropping duplicate URLs."""
+        if not self.api_key:
+            return ToolResult(False, error="Missing NEWS_API_KEY.")
+
+        def fetch(topic):
+            try:
+                return topic, self.search(topic, language, max_articles), None
+            except Exception as e:
+                return topic, [], str(e)
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(topics)) or 1) as executor:
+            results = list(executor.map(fetch, topics))
+
+        seen = set()
+        articles = []
+        errors = []
+        for topic, found, error in results:
+            if error:
+                errors.append(f"{topic}: {error}")
+            for article in found:
+                url = _url_key(article.get("url"))
+                if url and url in seen:
+                    continue
+                seen.add(url)
+                articles.append(article)
+        if not articles:
+            return ToolResult(False, error="; ".join(errors) or "No articles found.")
+        return ToolResult(True, format_articles(articles))
+
+    def stats(self):
+        with self._lock:
+            latencies = list(self._latencies)
+        lookups = self.hits + self.revalidated + self.misses
+        p50 = percentile(latencies, 0.5)
+        p99 = percentile(latencies, 0.99)
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.revalidated) / lookups if lookups else 0.0,
+            "requests": len(latencies),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p99_ms": round(p99 * 1000, 1) if p99 is not None else None,
+        }
+
+
+class YouTubeTranscriptTool:
+    def run(self, video_url):
+        from transcript_store import get_transcript_store, join_segments
+
+        video_id = self.extract_id(video_url)
+        if not video_id:
+            return ToolResult(False, error="Invalid YouTube URL or ID")
+
+        try:
+            data = get_transcript_store().get_segments(video_id, languages=("en",))
+            text = join_segments(data, "\n")
+            return ToolResult(True, text)
+        except Exception as e:
+            return ToolResult(False, error=str(e))
+
+    def extract_id(self, url):
+        match = re.search(r'(?:v=|\/)([A-Za-z0-9_-]{11})', url)
+        return match.group(1) if match else None
+
+
+class LLMTool:
+    def __init__(self, model="gpt-4o-mini", api_key=None, system_prompt="You are a helpful assistant.", api_base=None):
+        import openai
+        self.openai = openai
+        self.model = model
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.system_prompt = system_prompt
+        # Point at any OpenAI-compatible server, e.g. a local fake one in tests.
+        self.api_base = api_base or os.getenv("OPENAI_API_BASE")
+
+    def _messages(self, prompt):
+        return [{"role": "system", "content": self.system_prompt}, {"role": "user", "content": prompt}]
+
+    def _options(self):
+        return {"api_base": self.api_base} if self.api_base else {}
+
+    def run(self, prompt):
+        if not self.api_key:
+            return ToolResult(False, error="Missing OPENAI_API_KEY")
+        try:
+            self.openai.api_key = self.api_key
+            messages = self._messages(prompt)
+
+            def call():
+                with span("llm", self.model, provider="openai", bytes_in=payload_bytes(messages)) as s:
+                    response = self.openai.ChatCompletion.create(model=self.model, messages=messages, **self._options())
+                    text = response["choices"][0]["message"]["content"]
+                    usage = response.get("usage") or {}
+                    s.set(
+                        bytes_out=len(text.encode("utf-8")),
+                        tokens_in=usage.get("prompt_tokens"),
+                        tokens_out=usage.get("completion_tokens"),
+                    )
+                return text
+
+            text = get_llm_cache().get_or_call(self.model, json.dumps(messages), call)
+            return ToolResult(True, text)
+        except Exception as e:
+            return ToolResult(False, error=str(e))
+
+    def stream(self, prompt):
+        """
+        Yields the response text as tokens arrive. A cached response is yielded
+        in one piece; a completed stream is added to the cache.
+        """
+        if not self.api_key:
+            raise RuntimeError("Missing OPENAI_API_KEY")
+        self.openai.api_key = self.api_key
+        messages = self._messages(prompt)
+
+        def tokens():
+            with span("llm", self.model, provider="openai", stream=True, bytes_in=payload_bytes(messages)) as s:
+                start = time.perf_counter()
+                response = self.openai.ChatCompletion.create(
+                    model=self.model, messages=messages, stream=True, **self._options()
+                )
+                count, size = 0, 0
+                for event in response:
+                    delta = event["choices"][0].get("delta", {}).get("content")
+                    if delta:
+                        if not count:
+                            s.set(ttft_ms=round((time.perf_counter() - start) * 1000, 3))
+                        count += 1
+                        size += len(delta.encode("utf-8"))
+                        yield delta
+                # The legacy streaming API reports no usage; each delta is roughly one token.
+                s.set(bytes_out=size, tokens_out=count)
+
+        return get_llm_cache().get_or_stream(self.model, json.dumps(messages), tokens)
+
+
+def serve_stub(handler):
+    """Starts a threaded HTTP server for a stub handler on a free local port."""
+    from http.server import ThreadingHTTPServer
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_stub_news_handler(latency=0.05):
+    """NewsAPI-compatible handler: deterministic articles per topic, ETag revalidation, fixed latency."""
+    import hashlib
+    from http.server import BaseHTTPRequestHandler
+    from urllib.parse import parse_qs, urlparse
+
+    class StubNewsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            query = parse_qs(urlparse(self.path).query)
+            topic = query["q"][0]
+            etag = '"' + hashlib.sha1(topic.encode()).hexdigest() + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            articles = [
+                {"title": f"{topic} story {i}", "source": {"name": "Stub"}, "url": f"http://stub/{i % 3}",
+                 "description": f"About {topic}"}
+                for i in range(int(query["pageSize"][0]))
+            ]
+            body = json.dumps({"status": "ok", "articles": articles}).encode()
+            self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_):
+            pass
+
+    return StubNewsHandler
+
+
+def make_fake_openai_handler(tokens=50, ttft=0.3, rate=100.0):
+    """OpenAI-compatible chat completions handler; streams one word per server-sent event."""
+    from http.server import BaseHTTPRequestHandler
+
+    class FakeOpenAIHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            words = [f"word{i} " for i in range(tokens)]
+            time.sleep(ttft)
+            if not request.get("stream"):
+                body = json.dumps({"choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(words)}}]})
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(body.encode())
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for word in words:
+                event = {"choices": [{"index": 0, "delta": {"content": word}, "finish_reason": None}]}
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                self.wfile.flush()
+                time.sleep(1 / rate)
+            self.wfile.write(b"data: [DONE]\n\n")
+
+        def log_message(self, *_):
+            pass
+
+    return FakeOpenAIHandler
+
+
+def _run_news_stub(args):
+    server = serve_stub(make_stub_news_handler(args.latency))
+    tool = NewsSearchTool(api_key="stub", endpoint=f"http://127.0.0.1:{server.server_port}/v2/everything", ttl_seconds=args.ttl)
+    for round_no in range(args.rounds):
+        start = time.perf_counter()
+        result = tool.run_many(args.topics)
+        articles = result.output.count("Title:") if result.ok else 0
+        print(f"round {round_no + 1}: {articles} unique articles in {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(json.dumps(tool.stats(), indent=2))
+    server.shutdown()
+
+
+def _run_llm_stub(args):
+    try:
+        import openai
+    except ImportError:
+        raise SystemExit("The llm harness needs the openai package (0.28.x) installed.")
+    os.environ["LLM_CACHE_DISABLED"] = "1"
+    server = serve_stub(make_fake_openai_handler(args.tokens, args.ttft, args.rate))
+    tool = LLMTool(api_key="fake", api_base=f"http://127.0.0.1:{server.server_port}/v1")
+    start = time.perf_counter()
+    first = None
+    tokens = 0
+    for chunk in tool.stream("Write something."):
+        if first is None:
+            first = time.perf_counter() - start
+        tokens += 1
+    total = time.perf_counter() - start
+    print(json.dumps({
+        "ttft_s": round(first, 3),
+        "total_s": round(total, 3),
+        "tokens": tokens,
+        "tokens_per_second": round(tokens / (total - first), 1) if total > first else None,
+    }, indent=2))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Exercise the crew tools against local stub servers.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    news = commands.add_parser("news", help="NewsSearchTool against a stub NewsAPI server")
+    news.add_argument("topics", nargs="+")
+    news.add_argument("--rounds", type=int, default=3)
+    news.add_argument("--latency", type=float, default=0.05, help="Stub server delay per request in seconds")
+    news.add_argument("--ttl", type=float, default=0.0, help="Cache TTL; 0 revalidates on every round")
+    llm = commands.add_parser("llm", help="LLMTool.stream against a fake OpenAI-compatible server")
+    llm.add_argument("--tokens", type=int, default=50)
+    llm.add_argument("--ttft", type=float, default=0.3, help="Fake server delay before the first token")
+    llm.add_argument("--rate", type=float, default=100.0, help="Fake server tokens per second")
+    args = parser.parse_args()
+
+    if args.command == "news":
+        _run_news_stub(args)
+    else:
+        _run_llm_stub(args)
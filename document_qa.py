@@ -1,47 +1,138 @@
 import os
 from dotenv import load_dotenv
 from langchain_classic.text_splitter import RecursiveCharacterTextSplitter
-from langchain_classic.document_loaders import PyPDFLoader
 import streamlit as st
 from langchain_classic.chains import conversational_retrieval
 import google.generativeai as genai
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_groq import ChatGroq
-from langchain_classic.vectorstores import FAISS
+from index_cache import IndexCache, index_cache_key
+from embedding_store import CachedEmbeddings
+from pdf_ingest import ingest_pdf
+from corpus import Corpus
+from hybrid_retriever import BM25Index, HybridRetriever, documents_from_store
+from telemetry import get_telemetry, langchain_callbacks
 load_dotenv()
 
 api_key = os.getenv("GOOGLE_API_KEY")
 genai.configure(api_key=api_key)
 
-model = ChatGroq(api_key=os.getenv("GROQ_API_KEY"))
+model = ChatGroq(api_key=os.getenv("GROQ_API_KEY"), callbacks=langchain_callbacks())
 
-st.set_page_config(page_title="Document Q&A with Gemini + Groq", page_icon="📚")
-st.title("Ask Questions About Your Document")
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 150
+EMBEDDING_MODEL = "models/embedding-001"
 
-uploaded_file = st.file_uploader("Upload a PDF document", type=["pdf"])
-if uploaded_file is not None:
-    with st.spinner("Loading and processing your document..."):
-        
-        with open("temp.pdf", "wb") as f:
-            f.write(uploaded_file.read())
+@st.cache_resource
+def get_index_cache():
+    return IndexCache()
 
-        loader = PyPDFLoader("temp.pdf")
-        documents = loader.load()
-        splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=150)
-        chunks = splitter.split_documents(documents)
+@st.cache_resource
+def get_corpus():
+    return Corpus()
 
-        embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
-        vector_store = FAISS.from_documents(chunks, embedding=embeddings)
+@st.cache_resource
+def get_bm25_indexes():
+    return {}
 
-        retriever = vector_store.as_retriever(search_kwargs={"k": 4})
+def get_bm25(key, load_documents):
+    """Builds the BM25 index for a given document set once and reuses it across reruns."""
+    indexes = get_bm25_indexes()
+    if key not in indexes:
+        if len(indexes) >= 8:
+            indexes.pop(next(iter(indexes)))
+        indexes[key] = BM25Index(load_documents())
+    return indexes[key]
+
+@st.cache_resource
+def get_embeddings():
+    return CachedEmbeddings(GoogleGenerativeAIEmbeddings(model=EMBEDDING_MODEL), EMBEDDING_MODEL)
+
+def build_vector_store(data: bytes, embeddings, name: str):
+    """Streams, splits and embeds the uploaded PDF from memory into a fresh FAISS store."""
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    store, timings = ingest_pdf(data, embeddings, splitter, source=name)
+    st.session_state.ingest_timings = timings
+    return store
 
-        qa_chain = conversational_retrieval.from_llm(
-            llm=model,
-            retriever=retriever,
-            return_source_documents=True
-        )
+st.set_page_config(page_title="Document Q&A with Gemini + Groq", page_icon="📚")
+st.title("Ask Questions About Your Document")
 
-    st.success("Document processed! You can now ask questions below.")
+mode = st.sidebar.radio("Mode", ["Single document", "Corpus"])
+use_hybrid = st.sidebar.checkbox("Hybrid retrieval (BM25 + vector, deduplicated)", value=True)
+embeddings = get_embeddings()
+vector_store = None
+bm25 = None
+
+if mode == "Single document":
+    uploaded_file = st.file_uploader("Upload a PDF document", type=["pdf"])
+    if uploaded_file is not None:
+        with st.spinner("Loading and processing your document..."):
+            data = uploaded_file.getvalue()
+            settings = {"chunk_size": CHUNK_SIZE, "chunk_overlap": CHUNK_OVERLAP, "embedding_model": EMBEDDING_MODEL}
+
+            index_cache = get_index_cache()
+            key = index_cache_key(data, settings)
+            vector_store = index_cache.get_or_build(
+                key,
+                lambda: build_vector_store(data, embeddings, uploaded_file.name),
+                embeddings,
+            )
+            if use_hybrid:
+                bm25 = get_bm25(key, lambda: documents_from_store(vector_store))
+
+        st.success("Document processed! You can now ask questions below.")
+        with st.sidebar.expander("Index cache"):
+            st.json(index_cache.stats())
+            st.json({"chunk_hits": embeddings.hits, "chunks_embedded": embeddings.misses})
+        if "ingest_timings" in st.session_state:
+            with st.sidebar.expander("Ingestion timings (s)"):
+                st.json(st.session_state.ingest_timings)
+else:
+    corpus = get_corpus()
+    if "corpus_uploads" not in st.session_state:
+        st.session_state.corpus_uploads = set()
+
+    uploaded_files = st.file_uploader("Add PDF documents to the corpus", type=["pdf"], accept_multiple_files=True)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    for uploaded in uploaded_files or []:
+        # Only ingest each upload once per session, so a removed document isn't re-added on rerun.
+        if uploaded.file_id in st.session_state.corpus_uploads:
+            continue
+        with st.spinner(f"Adding {uploaded.name} to the corpus..."):
+            try:
+                corpus.add_pdf(uploaded.name, uploaded.getvalue(), embeddings, splitter)
+            except ValueError as e:
+                st.warning(f"{uploaded.name}: {e}")
+        st.session_state.corpus_uploads.add(uploaded.file_id)
+
+    st.sidebar.markdown("### Corpus documents")
+    for doc in corpus.documents():
+        col1, col2 = st.sidebar.columns([3, 1])
+        col1.write(f"{doc['name']} ({doc['chunks']} chunks)")
+        if col2.button("Remove", key=doc["doc_id"]):
+            corpus.remove(doc["doc_id"])
+            st.rerun()
+    with st.sidebar.expander("Corpus stats"):
+        st.json(corpus.stats())
+
+    vector_store = corpus.as_vector_store(embeddings)
+    if vector_store is None:
+        st.info("Add a PDF to start building the corpus.")
+    elif use_hybrid:
+        bm25 = get_bm25(("corpus",) + corpus.version(), corpus.all_documents)
+
+if vector_store is not None:
+    if bm25 is not None:
+        retriever = HybridRetriever(vector_store=vector_store, bm25=bm25, k=4)
+    else:
+        retriever = vector_store.as_retriever(search_kwargs={"k": 4})
+
+    qa_chain = conversational_retrieval.from_llm(
+        llm=model,
+        retriever=retriever,
+        return_source_documents=True
+    )
 
     if "chat_history" not in st.session_state:
         st.session_state.chat_history = []
@@ -60,4 +151,6 @@ if uploaded_file is not None:
             for doc in result["source_documents"]:
                 st.write(doc.page_content[:500] + "...")
 
-
+if get_telemetry().enabled:
+    with st.sidebar.expander("Telemetry"):
+        st.dataframe(get_telemetry().summary())
@@ -0,0 +1,150 @@
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from telemetry import payload_bytes, span
+
+
+def chunk_hash(text: str):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Content-addressed store of chunk vectors for a single embedding model.
+    Metadata (chunk hash -> row) lives in SQLite, the vectors themselves in a
+    memory-mapped float32 array that grows by doubling.
+    """
+
+    def __init__(self, model_name: str, root=None, initial_capacity=1024):
+        root = root or os.getenv("EMBEDDING_STORE_DIR", os.path.join(".cache", "embeddings"))
+        self.path = os.path.join(root, re.sub(r"[^A-Za-z0-9_.-]", "_", model_name))
+        os.makedirs(self.path, exist_ok=True)
+        self.vectors_path = os.path.join(self.path, "vectors.f32")
+        self.initial_capacity = initial_capacity
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(self.path, "chunks.db"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS chunks (hash TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self.conn.commit()
+        meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+        self.dim = meta.get("dim")
+        self.size = meta.get("size", 0)
+        self.capacity = meta.get("capacity", 0)
+        self.vectors = None
+        if self.dim:
+            self._open()
+
+    def _open(self):
+        self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(self.capacity, self.dim))
+
+    def _grow(self, needed: int):
+        capacity = max(self.capacity, self.initial_capacity)
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self.capacity and self.vectors is not None:
+            return
+        if self.vectors is not None:
+            self.vectors.flush()
+            self.vectors = None
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(capacity * self.dim * 4)
+        self.capacity = capacity
+        self._open()
+
+    def lookup(self, hashes):
+        """Returns {hash: row} for the hashes that are already stored."""
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            for i in range(0, len(unique), 900):
+                batch = unique[i:i + 900]
+                placeholders = ",".join("?" * len(batch))
+                found.update(self.conn.execute(
+                    f"SELECT hash, row FROM chunks WHERE hash IN ({placeholders})", batch
+                ))
+        return found
+
+    def add(self, hashes, vectors):
+        """Appends new vectors and returns {hash: row} for them."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+            start = self.size
+            self._grow(start + len(hashes))
+            self.vectors[start:start + len(hashes)] = vectors
+            self.vectors.flush()
+            rows = {h: start + i for i, h in enumerate(hashes)}
+            self.size = start + len(hashes)
+            # Vectors are flushed before the metadata that points at them is committed.
+            with self.conn:
+                self.conn.executemany("INSERT OR IGNORE INTO chunks (hash, row) VALUES (?, ?)", rows.items())
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                    [("dim", self.dim), ("size", self.size), ("capacity", self.capacity)],
+                )
+        return rows
+
+    def rows(self, row_ids):
+        """
+        Returns the vectors for `row_ids`. Consecutive rows (the common case for a
+        freshly embedded document) come back as a view of the memory map.
+        """
+        row_ids = np.asarray(row_ids, dtype=np.int64)
+        # _grow() swaps the memmap under the lock; a view keeps the old map alive after that.
+        with self._lock:
+            vectors = self.vectors
+        if len(row_ids) and np.all(np.diff(row_ids) == 1):
+            return vectors[row_ids[0]:row_ids[-1] + 1]
+        return vectors[row_ids]
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that only sends chunks missing from the EmbeddingStore
+    to the underlying backend, in batches.
+    """
+
+    def __init__(self, embeddings, model_name: str, store=None, batch_size=None):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.store = store or EmbeddingStore(model_name)
+        self.batch_size = batch_size or int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))
+        self.hits = 0
+        self.misses = 0
+
+    def embed_matrix(self, texts):
+        """Returns a float32 matrix with one row per text, embedding only unseen chunks."""
+        with span("embedding", self.model_name, items=len(texts)) as s:
+            hashes = [chunk_hash(t) for t in texts]
+            found = self.store.lookup(hashes)
+
+            missing = {}
+            for h, text in zip(hashes, texts):
+                if h not in found and h not in missing:
+                    missing[h] = text
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+            s.set(cache="miss" if missing else "hit", embedded=len(missing), bytes_in=payload_bytes(list(missing.values())))
+
+            pending = list(missing.items())
+            for i in range(0, len(pending), self.batch_size):
+                batch = pending[i:i + self.batch_size]
+                vectors = self.embeddings.embed_documents([text for _, text in batch])
+                found.update(self.store.add([h for h, _ in batch], vectors))
+
+            return self.store.rows([found[h] for h in hashes])
+
+    def embed_documents(self, texts):
+        return self.embed_matrix(texts).tolist()
+
+    def embed_query(self, text):
+        with span("embedding", self.model_name, items=1, bytes_in=payload_bytes(text)):
+            return self.embeddings.embed_query(text)
@@ -0,0 +1,182 @@
+import re
+import math
+import time
+from collections import Counter, defaultdict
+from typing import Any, List
+
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from chat_session import estimate_tokens
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "did", "do", "does", "for", "from", "how", "i",
+    "in", "is", "it", "of", "on", "or", "that", "the", "this", "to", "was", "what", "when", "where",
+    "which", "who", "why", "with", "about", "me", "tell", "can", "you", "document",
+}
+
+
+def tokenize(text: str):
+    return TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    """Small in-memory inverted index with Okapi BM25 scoring."""
+
+    def __init__(self, documents: List[Document], k1=1.5, b=0.75):
+        self.documents = documents
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)
+        self.lengths = []
+        self.term_sets = []
+        for doc_idx, doc in enumerate(documents):
+            counts = Counter(tokenize(doc.page_content))
+            for term, tf in counts.items():
+                self.postings[term].append((doc_idx, tf))
+            self.lengths.append(sum(counts.values()))
+            self.term_sets.append(frozenset(counts))
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+    def search(self, query: str, k=20):
+        """Returns [(doc_idx, score)] for the top `k` documents."""
+        n = len(self.documents)
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_idx, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_idx] / (self.avg_length or 1))
+                scores[doc_idx] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+def _min_max(scores: dict):
+    if not scores:
+        return {}
+    lo, hi = min(scores.values()), max(scores.values())
+    if hi == lo:
+        return {key: 1.0 for key in scores}
+    return {key: (value - lo) / (hi - lo) for key, value in scores.items()}
+
+
+def _overlap(a: frozenset, b: frozenset):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Combines BM25 and FAISS similarity, then picks passages MMR-style: each pick
+    trades relevance against overlap with passages already chosen, and selection
+    stops once the question's terms are covered or the token budget is spent.
+    """
+
+    vector_store: Any
+    bm25: Any
+    k: int = 4
+    fetch_k: int = 20
+    alpha: float = 0.5
+    mmr_lambda: float = 0.7
+    max_tokens: int = 1200
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        candidates = {}
+        dense = {}
+        for doc, distance in self.vector_store.similarity_search_with_score(query, k=self.fetch_k):
+            candidates.setdefault(doc.page_content, doc)
+            dense[doc.page_content] = max(dense.get(doc.page_content, 0.0), 1.0 / (1.0 + float(distance)))
+
+        sparse = {}
+        for doc_idx, score in self.bm25.search(query, k=self.fetch_k):
+            doc = self.bm25.documents[doc_idx]
+            candidates.setdefault(doc.page_content, doc)
+            sparse[doc.page_content] = score
+
+        dense, sparse = _min_max(dense), _min_max(sparse)
+        relevance = {
+            text: self.alpha * dense.get(text, 0.0) + (1 - self.alpha) * sparse.get(text, 0.0)
+            for text in candidates
+        }
+        terms = {text: frozenset(tokenize(text)) for text in candidates}
+        wanted = set(tokenize(query)) - STOPWORDS
+
+        selected, covered, used_tokens = [], set(), 0
+        remaining = set(candidates)
+        while remaining and len(selected) < self.k:
+            def mmr(text):
+                redundancy = max((_overlap(terms[text], terms[s]) for s in selected), default=0.0)
+                return self.mmr_lambda * relevance[text] - (1 - self.mmr_lambda) * redundancy
+
+            best = max(remaining, key=mmr)
+            remaining.discard(best)
+            cost = estimate_tokens(best)
+            if selected and used_tokens + cost > self.max_tokens:
+                break
+            selected.append(best)
+            used_tokens += cost
+            covered |= terms[best] & wanted
+            if wanted and covered >= wanted:
+                break
+        return [candidates[text] for text in selected]
+
+
+def documents_from_store(vector_store):
+    """Returns the chunks held by an in-memory FAISS store, in index order."""
+    docstore = vector_store.docstore
+    return [docstore.search(doc_id) for _, doc_id in sorted(vector_store.index_to_docstore_id.items())]
+
+
+def benchmark(vector_store, documents, queries, k=4):
+    """
+    Compares the dense top-k retriever against HybridRetriever. Reports prompt
+    tokens and retrieval latency per query.
+    """
+    dense = vector_store.as_retriever(search_kwargs={"k": k})
+    hybrid = HybridRetriever(vector_store=vector_store, bm25=BM25Index(documents), k=k)
+    rows = []
+    for query in queries:
+        row = {"query": query}
+        for name, retriever in (("dense", dense), ("hybrid", hybrid)):
+            start = time.perf_counter()
+            docs = retriever.invoke(query)
+            row[f"{name}_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            row[f"{name}_passages"] = len(docs)
+            row[f"{name}_tokens"] = sum(estimate_tokens(d.page_content) for d in docs)
+        rows.append(row)
+    return rows
+
+
+if __name__ == "__main__":
+    import json
+    import argparse
+    from langchain_classic.text_splitter import RecursiveCharacterTextSplitter
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+    from dotenv import load_dotenv
+    from embedding_store import CachedEmbeddings
+    from pdf_ingest import ingest_pdf
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Benchmark dense vs hybrid retrieval on a PDF.")
+    parser.add_argument("pdf")
+    parser.add_argument("queries", help="Text file with one question per line")
+    args = parser.parse_args()
+
+    model_name = "models/embedding-001"
+    embeddings = CachedEmbeddings(GoogleGenerativeAIEmbeddings(model=model_name), model_name)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=150)
+    with open(args.pdf, "rb") as f:
+        store, _ = ingest_pdf(f.read(), embeddings, splitter, source=args.pdf)
+    with open(args.queries) as f:
+        queries = [line.strip() for line in f if line.strip()]
+
+    rows = benchmark(store, documents_from_store(store), queries)
+    for row in rows:
+        print(json.dumps(row))
+    for name in ("dense", "hybrid"):
+        print(f"{name}: mean tokens {sum(r[f'{name}_tokens'] for r in rows) / len(rows):.0f}, "
+              f"mean latency {sum(r[f'{name}_ms'] for r in rows) / len(rows):.2f} ms")
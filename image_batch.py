@@ -0,0 +1,160 @@
+import io
+import os
+import time
+import zipfile
+import hashlib
+import tracemalloc
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from image_prep import prepare_image
+from telemetry import peak_rss_mb
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+
+
+def iter_zip_images(data: bytes):
+    """Yields (name, bytes) for the images inside a zip archive, reading one member at a time."""
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        for info in archive.infolist():
+            if not info.is_dir() and info.filename.lower().endswith(IMAGE_EXTENSIONS):
+                yield info.filename, archive.read(info)
+
+
+def _inside(root: str, path: str):
+    return os.path.commonpath([root, path]) == root
+
+
+def resolve_folder(folder: str, root: str):
+    """
+    Real path of `folder` (relative paths are taken from `root`) if it is a
+    directory inside `root`, else None. Symlinks and ".." cannot escape the root.
+    """
+    root = os.path.realpath(root)
+    path = os.path.realpath(os.path.join(root, folder))
+    return path if _inside(root, path) and os.path.isdir(path) else None
+
+
+def iter_folder_images(folder: str, root=None):
+    """Yields (relative name, bytes) for images under `folder`, skipping files whose real path leaves `root`."""
+    root = os.path.realpath(root or folder)
+    for dirpath, _, files in os.walk(folder):
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                path = os.path.join(dirpath, name)
+                if not _inside(root, os.path.realpath(path)):
+                    continue
+                with open(path, "rb") as f:
+                    yield os.path.relpath(path, folder), f.read()
+
+
+class ImageResult:
+    def __init__(self, name, digest, thumbnail=None, answer=None, error=None, seconds=0.0, duplicate_of=None):
+        self.name = name
+        self.digest = digest
+        self.thumbnail = thumbnail
+        self.answer = answer
+        self.error = error
+        self.seconds = seconds
+        self.duplicate_of = duplicate_of
+
+
+class BatchStats:
+    def __init__(self):
+        self.images = 0
+        self.unique = 0
+        self.failed = 0
+        self.bytes_in = 0
+        self.bytes_sent = 0
+        self.wall_seconds = 0.0
+        self.peak_traced_bytes = 0
+
+    def as_dict(self):
+        return {
+            "images": self.images,
+            "unique": self.unique,
+            "failed": self.failed,
+            "bytes_in": self.bytes_in,
+            "bytes_sent": self.bytes_sent,
+            "wall_seconds": round(self.wall_seconds, 2),
+            "images_per_second": round(self.images / self.wall_seconds, 2) if self.wall_seconds else 0.0,
+            "peak_python_memory_mb": round(self.peak_traced_bytes / 1e6, 1),
+            # Includes Pillow's pixel buffers, which tracemalloc does not see.
+            "peak_process_rss_mb": peak_rss_mb(),
+        }
+
+
+def describe_batch(sources, describe, stats: BatchStats, max_workers=None, thumbnail_side=256, track_memory=True):
+    """
+    Describes many images with at most `max_workers` calls in flight.
+    `sources` yields (name, bytes); `describe(prepared, digest)` returns the text.
+    Each image is decoded once into a capped model payload plus a display
+    thumbnail, and byte-identical images are described only once.
+    Yields ImageResult objects as they finish, in completion order.
+    """
+    max_workers = max_workers or int(os.getenv("IMAGE_DESCRIBE_CONCURRENCY", "4"))
+    started_tracing = track_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    start = time.perf_counter()
+
+    def work(name, data, digest):
+        began = time.perf_counter()
+        try:
+            prepared = prepare_image(data, thumbnail_side=thumbnail_side)
+        except Exception as e:
+            return ImageResult(name, digest, error=f"Could not decode image: {e}"), 0
+        try:
+            answer = describe(prepared, digest)
+            return ImageResult(name, digest, prepared.thumbnail, answer, seconds=time.perf_counter() - began), len(prepared.data)
+        except Exception as e:
+            return ImageResult(name, digest, prepared.thumbnail, error=str(e), seconds=time.perf_counter() - began), 0
+
+    first_seen = {}
+    finished = {}
+    waiting = {}
+    pending = set()
+
+    def collect(done):
+        for future in done:
+            result, sent = future.result()
+            stats.bytes_sent += sent
+            stats.failed += int(result.error is not None)
+            finished[result.digest] = result
+            yield result
+            for name in waiting.pop(result.digest, []):
+                yield _duplicate(name, result)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for name, data in sources:
+                stats.images += 1
+                stats.bytes_in += len(data)
+                digest = hashlib.sha256(data).hexdigest()
+                if digest in finished:
+                    yield _duplicate(name, finished[digest])
+                    continue
+                if digest in first_seen:
+                    waiting.setdefault(digest, []).append(name)
+                    continue
+                first_seen[digest] = name
+                stats.unique += 1
+                if len(pending) >= max_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from collect(done)
+                pending.add(executor.submit(work, name, data, digest))
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from collect(done)
+    finally:
+        stats.wall_seconds = time.perf_counter() - start
+        if track_memory and tracemalloc.is_tracing():
+            stats.peak_traced_bytes = max(stats.peak_traced_bytes, tracemalloc.get_traced_memory()[1])
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def _duplicate(name, original: ImageResult):
+    return ImageResult(
+        name, original.digest, original.thumbnail, original.answer, original.error, duplicate_of=original.name
+    )
@@ -1,34 +1,96 @@
 import os
 from dotenv import load_dotenv
-import io
 import streamlit as st
-from PIL import Image
 import google.generativeai as genai
+from llm_cache import get_llm_cache, image_digest
+from telemetry import get_telemetry, instrument_gemini
+from image_prep import prepare_image
+from image_batch import BatchStats, describe_batch, iter_folder_images, iter_zip_images, resolve_folder
 load_dotenv()
 
 api_key = os.getenv("GOOGLE_API_KEY")
 genai.configure(api_key=api_key)
 
-model = genai.GenerativeModel("gemini-2.5-pro")
+model = instrument_gemini(genai.GenerativeModel("gemini-2.5-pro"))
 
 st.title("Image Describer")
 st.markdown("Upload an image, provide a prompt, and see what the Gemini model says.")
 
-uploaded_file = st.file_uploader("Choose an image file (PNG/JPG)", type=["png","jpg","jpeg"])
-prompt = st.text_area("Enter your prompt", height=100)
+def describe(prompt, prepared, digest):
+    return get_llm_cache().get_or_call(
+        model.model_name,
+        prompt,
+        lambda: model.generate_content([prepared.part(), prompt]).text,
+        images=[digest],
+    )
 
-if uploaded_file is not None and prompt:
-    try:
-        image = Image.open(uploaded_file).convert("RGB")
-        st.image(image, caption="Uploaded image")
+mode = st.radio("Mode", ["Single image", "Batch"], horizontal=True)
 
-        image = Image.open(uploaded_file)
+if mode == "Single image":
+    uploaded_file = st.file_uploader("Choose an image file (PNG/JPG)", type=["png","jpg","jpeg"])
+    prompt = st.text_area("Enter your prompt", height=100)
 
-        with st.spinner("Calling Gemini API…"):
-            answer = model.generate_content([image,prompt]).text
+    if uploaded_file is not None and prompt:
+        try:
+            data = uploaded_file.getvalue()
+            prepared = prepare_image(data, thumbnail_side=512)
+            st.image(prepared.thumbnail, caption="Uploaded image")
 
-        st.subheader("Model’s response")
-        st.write(answer)
+            with st.spinner("Calling Gemini API…"):
+                answer = describe(prompt, prepared, image_digest(data))
 
-    except Exception as e:
-        st.error(f"Error: {e}")
\ No newline at end of file
+            st.subheader("Model’s response")
+            st.write(answer)
+
+        except Exception as e:
+            st.error(f"Error: {e}")
+else:
+    uploaded_files = st.file_uploader(
+        "Choose image files or a zip archive", type=["png", "jpg", "jpeg", "webp", "zip"], accept_multiple_files=True
+    )
+    # Server folders are only offered below an explicitly configured root.
+    batch_root = os.getenv("IMAGE_BATCH_ROOT")
+    folder = None
+    if batch_root:
+        folder = st.text_input(f"...or a folder under {batch_root} on the server", placeholder="e.g. photos")
+    prompt = st.text_area("Enter your prompt", height=100)
+    workers = st.slider("Concurrent requests", 1, 16, int(os.getenv("IMAGE_DESCRIBE_CONCURRENCY", "4")))
+
+    def sources():
+        for uploaded in uploaded_files or []:
+            if uploaded.name.lower().endswith(".zip"):
+                yield from iter_zip_images(uploaded.getvalue())
+            else:
+                yield uploaded.name, uploaded.getvalue()
+        if folder:
+            path = resolve_folder(folder, batch_root)
+            if path:
+                yield from iter_folder_images(path, batch_root)
+            else:
+                st.warning(f"Folder not found under {batch_root}: {folder}")
+
+    if st.button("Describe all", disabled=not prompt or not (uploaded_files or folder)):
+        stats = BatchStats()
+        progress = st.empty()
+        for result in describe_batch(sources(), lambda prepared, digest: describe(prompt, prepared, digest), stats, workers):
+            thumb, text = st.columns([1, 3])
+            with thumb:
+                if result.thumbnail:
+                    st.image(result.thumbnail)
+            with text:
+                st.markdown(f"**{result.name}**" + (f" _(same image as {result.duplicate_of})_" if result.duplicate_of else ""))
+                if result.error:
+                    st.error(result.error)
+                else:
+                    st.write(result.answer)
+            progress.caption(f"{stats.images} image(s) read, {stats.unique} unique")
+        progress.empty()
+        st.subheader("Batch stats")
+        st.json(stats.as_dict())
+
+with st.sidebar.expander("LLM cache"):
+    st.json(get_llm_cache().stats())
+
+if get_telemetry().enabled:
+    with st.sidebar.expander("Telemetry"):
+        st.dataframe(get_telemetry().summary())
@@ -0,0 +1,131 @@
+import io
+import os
+import time
+import threading
+from collections import deque
+
+from PIL import Image, ImageOps
+
+MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+
+
+def perceptual_hash(image: Image.Image, size=8):
+    """
+    64-bit difference hash (robust to re-encoding and resizing) followed by the
+    coarse mean colour, so flat images of different colours do not collide.
+    """
+    mean = image.convert("RGB").resize((1, 1), Image.Resampling.BOX).getpixel((0, 0))
+    colour = "".join(f"{channel // 16:x}" for channel in mean)
+    gray = image.convert("L").resize((size + 1, size), Image.Resampling.LANCZOS)
+    pixels = list(gray.getdata())
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return f"{bits:0{size * size // 4}x}-{colour}"
+
+
+def hamming(a: str, b: str):
+    """Bit distance between the difference-hash parts of two perceptual hashes."""
+    return bin(int(a.split("-")[0], 16) ^ int(b.split("-")[0], 16)).count("1")
+
+
+class PreparedImage:
+    def __init__(self, data, mime_type, size, original_bytes, encode_seconds, phash, thumbnail=None):
+        self.data = data
+        self.mime_type = mime_type
+        self.size = size
+        self.original_bytes = original_bytes
+        self.encode_seconds = encode_seconds
+        self.phash = phash
+        self.thumbnail = thumbnail
+
+    def part(self):
+        """The inline image part expected by GenerativeModel.generate_content."""
+        return {"mime_type": self.mime_type, "data": self.data}
+
+
+def prepare_image(data: bytes, max_side=None, image_format=None, quality=None, thumbnail_side=None):
+    """
+    Decodes an upload, applies its EXIF orientation, downscales it so the
+    longest side is at most `max_side` and re-encodes it without metadata.
+    With `thumbnail_side`, a small JPEG for display is cut from the same decode.
+    """
+    max_side = max_side or int(os.getenv("IMAGE_MAX_SIDE", "1024"))
+    image_format = (image_format or os.getenv("IMAGE_FORMAT", "JPEG")).upper()
+    quality = quality or int(os.getenv("IMAGE_QUALITY", "85"))
+
+    start = time.perf_counter()
+    image = Image.open(io.BytesIO(data))
+    # Lets the JPEG decoder skip straight to a reduced scale for large photos.
+    image.draft("RGB", (max_side, max_side))
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+
+    buffer = io.BytesIO()
+    if image_format == "PNG":
+        image.save(buffer, format="PNG", optimize=True)
+    else:
+        image.save(buffer, format=image_format, quality=quality, optimize=True)
+    encoded = buffer.getvalue()
+
+    thumbnail = None
+    if thumbnail_side:
+        small = image.copy()
+        small.thumbnail((thumbnail_side, thumbnail_side), Image.Resampling.BILINEAR)
+        buffer = io.BytesIO()
+        small.save(buffer, format="JPEG", quality=80)
+        thumbnail = buffer.getvalue()
+    encode_seconds = time.perf_counter() - start
+    return PreparedImage(
+        encoded, MIME_TYPES[image_format], image.size, len(data), encode_seconds, perceptual_hash(image), thumbnail
+    )
+
+
+class ImageResultIndex:
+    """
+    Maps perceptual hashes onto the hash of a previously analysed image within
+    `max_distance` bits, so a visually identical photo reuses its cached result.
+    Also keeps the payload and cache statistics for the sidebar.
+    """
+
+    def __init__(self, max_distance=None, max_items=1024):
+        self.max_distance = max_distance if max_distance is not None else int(os.getenv("IMAGE_HASH_DISTANCE", "4"))
+        self._hashes = deque(maxlen=max_items)
+        self._lock = threading.Lock()
+        self.images = 0
+        self.hits = 0
+        self.original_bytes = 0
+        self.bytes_sent = 0
+        self.encode_seconds = 0.0
+
+    def canonical(self, phash: str):
+        with self._lock:
+            for seen in self._hashes:
+                if seen.split("-")[1] == phash.split("-")[1] and hamming(seen, phash) <= self.max_distance:
+                    return seen
+            self._hashes.append(phash)
+            return phash
+
+    def record(self, prepared: PreparedImage, hit: bool):
+        with self._lock:
+            self.images += 1
+            self.hits += int(hit)
+            self.original_bytes += prepared.original_bytes
+            self.encode_seconds += prepared.encode_seconds
+            if not hit:
+                self.bytes_sent += len(prepared.data)
+
+    def stats(self):
+        return {
+            "images": self.images,
+            "cache_hits": self.hits,
+            "hit_rate": self.hits / self.images if self.images else 0.0,
+            "original_bytes": self.original_bytes,
+            "bytes_sent": self.bytes_sent,
+            "mean_encode_ms": round(self.encode_seconds * 1000 / self.images, 1) if self.images else 0.0,
+        }
@@ -0,0 +1,136 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+
+from langchain_classic.vectorstores import FAISS
+
+
+def index_cache_key(data: bytes, settings: dict):
+    """
+    Hashes the uploaded bytes together with the splitter/embedding settings used to build the index.
+    """
+    digest = hashlib.sha256(data)
+    digest.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _dir_size(path: str):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _touch(path: str):
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+
+
+class IndexCache:
+    """
+    Two-tier cache of built FAISS vector stores: an in-process LRU in front of
+    copies saved to disk. The disk tier is bounded by total size and evicts the
+    least recently used index first.
+    """
+
+    def __init__(self, cache_dir=None, max_memory_items=8, max_disk_bytes=None):
+        self.cache_dir = cache_dir or os.getenv("INDEX_CACHE_DIR", os.path.join(".cache", "faiss"))
+        self.max_memory_items = max_memory_items
+        if max_disk_bytes is None:
+            max_disk_bytes = int(os.getenv("INDEX_CACHE_MAX_MB", "512")) * 1024 * 1024
+        self.max_disk_bytes = max_disk_bytes
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def get_or_build(self, key: str, build, embeddings):
+        """
+        Returns the vector store for `key`, calling `build()` only when neither tier has it.
+        """
+        path = os.path.join(self.cache_dir, key)
+        with self._lock:
+            store = self._memory.get(key)
+            if store is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+        if store is not None:
+            # Disk eviction goes by mtime, so memory hits must keep the saved copy fresh too.
+            _touch(path)
+            return store
+
+        if os.path.isdir(path):
+            try:
+                store = FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True)
+                _touch(path)
+                self.disk_hits += 1
+            except Exception:
+                shutil.rmtree(path, ignore_errors=True)
+                store = None
+
+        if store is None:
+            self.misses += 1
+            store = build()
+            self._save(key, store)
+
+        with self._lock:
+            self._memory[key] = store
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_items:
+                self._memory.popitem(last=False)
+        return store
+
+    def _save(self, key: str, store):
+        path = os.path.join(self.cache_dir, key)
+        tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        store.save_local(tmp_path)
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            # Another session finished the same index first; keep theirs.
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        self._evict_disk(keep=key)
+
+    def _evict_disk(self, keep=None):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if not os.path.isdir(path) or ".tmp-" in name:
+                continue
+            entries.append((os.path.getmtime(path), _dir_size(path), name, path))
+
+        total = sum(size for _, size, _, _ in entries)
+        for _, size, name, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            if name == keep:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            with self._lock:
+                self._memory.pop(name, None)
+            total -= size
+            self.evictions += 1
+
+    def stats(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory_items": len(self._memory),
+        }
@@ -0,0 +1,169 @@
+import re
+import ast
+import json
+
+FENCE_RE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$", re.IGNORECASE)
+TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def _requote(text: str):
+    """Rewrites single-quoted strings as JSON strings and Python literals as JSON ones."""
+    out = []
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char == '"':
+            end = i + 1
+            while end < len(text) and text[end] != '"':
+                end += 2 if text[end] == "\\" else 1
+            out.append(text[i:end + 1])
+            i = end + 1
+        elif char == "'":
+            end = i + 1
+            while end < len(text):
+                if text[end] == "\\":
+                    end += 2
+                    continue
+                if text[end] == "'" and _closes(text, end + 1):
+                    break
+                end += 1
+            out.append(json.dumps(text[i + 1:end].replace("\\'", "'")))
+            i = end + 1
+        elif char.isalpha():
+            end = i
+            while end < len(text) and text[end].isalnum():
+                end += 1
+            word = text[i:end]
+            out.append(LITERALS.get(word, word))
+            i = end
+        else:
+            out.append(char)
+            i += 1
+    return "".join(out)
+
+
+def _closes(text: str, index: int):
+    """A quote closes a single-quoted string only if followed by a delimiter (so "chef's" survives)."""
+    rest = text[index:].lstrip()
+    return not rest or rest[0] in ",:}]"
+
+
+def loads_lenient(text: str):
+    """
+    json.loads that repairs common LLM output problems locally: code fences,
+    single-quoted strings, Python literals, trailing commas and unclosed
+    brackets at the end of a truncated response.
+    """
+    text = FENCE_RE.sub("", text.strip())
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    repaired = TRAILING_COMMA_RE.sub(r"\1", _requote(text))
+    try:
+        return json.loads(repaired)
+    except ValueError:
+        pass
+    # Truncated output: close what is open, dropping the unfinished tail one object at a time.
+    end = len(repaired)
+    while end > 0:
+        head = repaired[:end].rstrip().rstrip(",")
+        try:
+            return json.loads(TRAILING_COMMA_RE.sub(r"\1", head + _missing_closers(head)))
+        except ValueError:
+            end = repaired.rfind("}", 0, end - 1) + 1
+    return ast.literal_eval(text)
+
+
+def _missing_closers(text: str):
+    stack = []
+    in_string = False
+    escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "[{":
+            stack.append("]" if char == "[" else "}")
+        elif char in "]}" and stack:
+            stack.pop()
+    return ('"' if in_string else "") + "".join(reversed(stack))
+
+
+class JSONArrayStream:
+    """
+    Incremental parser for a streamed JSON array of objects. `feed(chunk)`
+    returns the objects of the outermost array that closed in this chunk, so
+    each can be rendered before the rest of the response arrives. Tolerates
+    single-quoted strings and other issues handled by loads_lenient.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.items = 0
+        self.repairs = 0
+        self._pos = 0
+        self._stack = []
+        self._quote = None
+        self._array_depth = None
+        self._item_start = None
+
+    def feed(self, chunk: str):
+        self.text += chunk
+        items = []
+        text = self.text
+        while self._pos < len(text):
+            char = text[self._pos]
+            if self._quote:
+                if char == "\\":
+                    if self._pos + 1 >= len(text):
+                        break
+                    self._pos += 2
+                    continue
+                if char == self._quote:
+                    if self._quote == "'" and not text[self._pos + 1:].strip():
+                        # Can't tell an apostrophe from a closing quote until more text arrives.
+                        break
+                    if self._quote == '"' or _closes(text, self._pos + 1):
+                        self._quote = None
+                self._pos += 1
+                continue
+
+            if char in "\"'":
+                self._quote = char
+            elif char in "[{":
+                self._stack.append(char)
+                if char == "[" and self._array_depth is None:
+                    self._array_depth = len(self._stack)
+                elif char == "{" and len(self._stack) == (self._array_depth or 0) + 1:
+                    self._item_start = self._pos
+            elif char in "]}" and self._stack:
+                self._stack.pop()
+                if char == "}" and self._item_start is not None and len(self._stack) == self._array_depth:
+                    items.append(self._parse(text[self._item_start:self._pos + 1]))
+                    self._item_start = None
+            self._pos += 1
+        self.items += len(items)
+        return items
+
+    def _parse(self, fragment: str):
+        try:
+            return json.loads(fragment)
+        except ValueError:
+            self.repairs += 1
+            return loads_lenient(fragment)
+
+    def finish(self):
+        """Parses the whole response once the stream ends (repairing it if needed)."""
+        try:
+            return json.loads(FENCE_RE.sub("", self.text.strip()))
+        except ValueError:
+            self.repairs += 1
+            return loads_lenient(self.text)
@@ -0,0 +1,191 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+from sqlite_util import connect
+from telemetry import span
+
+
+def normalize_prompt(prompt: str):
+    """Collapses whitespace so re-indented f-string prompts share a cache entry."""
+    return " ".join(prompt.split())
+
+
+def image_digest(data: bytes):
+    return hashlib.sha256(data).hexdigest()
+
+
+class LLMCache:
+    """
+    Prompt/response cache for LLM calls: an in-process LRU tier backed by a
+    SQLite tier, both subject to a TTL. The key covers the model, the
+    normalized prompt, the generation config and any image digests.
+    """
+
+    def __init__(self, path=None, max_memory_items=256, ttl_seconds=None, cache_sampled=None):
+        self.path = path or os.getenv("LLM_CACHE_PATH", os.path.join(".cache", "llm_cache.db"))
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv("LLM_CACHE_TTL_HOURS", "24")) * 3600
+        if cache_sampled is None:
+            # Set LLM_CACHE_SAMPLED=0 to always call the model when temperature > 0.
+            cache_sampled = os.getenv("LLM_CACHE_SAMPLED", "1") != "0"
+        self.ttl_seconds = ttl_seconds
+        self.cache_sampled = cache_sampled
+        self.max_memory_items = max_memory_items
+        self.enabled = os.getenv("LLM_CACHE_DISABLED", "0") != "1"
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.saved_seconds = 0.0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with connect(self.path) as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                response TEXT NOT NULL,
+                latency REAL NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """)
+
+    @staticmethod
+    def make_key(model: str, prompt: str, generation_config=None, images=()):
+        payload = json.dumps(
+            {
+                "model": model,
+                "prompt": normalize_prompt(prompt),
+                "config": generation_config or {},
+                "images": list(images),
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_or_call(self, model: str, prompt: str, call, generation_config=None, images=()):
+        """
+        Returns the cached response text for this request, or runs `call()`
+        (which must return the response text) and stores its result.
+        """
+        with span("llm_cache", model) as s:
+            temperature = (generation_config or {}).get("temperature", 0) or 0
+            if not self.enabled or (temperature > 0 and not self.cache_sampled):
+                with self._lock:
+                    self.bypassed += 1
+                s.set(cache="bypass")
+                return call()
+
+            key = self.make_key(model, prompt, generation_config, images)
+            now = time.time()
+            cached = self._lookup(key, now)
+            if cached is not None:
+                s.set(cache="hit")
+                return cached
+
+            s.set(cache="miss")
+            start = time.perf_counter()
+            response = call()
+            self._store(key, model, response, time.perf_counter() - start, now)
+            return response
+
+    def get_or_stream(self, model: str, prompt: str, stream, generation_config=None, images=()):
+        """
+        Streaming counterpart of get_or_call: yields text chunks from
+        `stream()` and caches the joined response once it completes. A cached
+        response is yielded as a single chunk.
+        """
+        with span("llm_cache", model, stream=True) as s:
+            temperature = (generation_config or {}).get("temperature", 0) or 0
+            if not self.enabled or (temperature > 0 and not self.cache_sampled):
+                with self._lock:
+                    self.bypassed += 1
+                s.set(cache="bypass")
+                yield from stream()
+                return
+
+            key = self.make_key(model, prompt, generation_config, images)
+            now = time.time()
+            cached = self._lookup(key, now)
+            if cached is not None:
+                s.set(cache="hit")
+                yield cached
+                return
+
+            s.set(cache="miss")
+            start = time.perf_counter()
+            chunks = []
+            for chunk in stream():
+                chunks.append(chunk)
+                yield chunk
+            self._store(key, model, "".join(chunks), time.perf_counter() - start, now)
+
+    def _lookup(self, key, now):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[2] < self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                self.saved_seconds += entry[1]
+                return entry[0]
+
+        with connect(self.path) as conn:
+            row = conn.execute(
+                "SELECT response, latency, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is not None and now - row[2] < self.ttl_seconds:
+            with self._lock:
+                self.disk_hits += 1
+                self.saved_seconds += row[1]
+                self._remember(key, row)
+            return row[0]
+        return None
+
+    def _store(self, key, model, response, latency, now):
+        entry = (response, latency, now)
+        with connect(self.path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, latency, created_at) VALUES (?, ?, ?, ?, ?)",
+                (key, model, response, latency, now),
+            )
+            conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        with self._lock:
+            self.misses += 1
+            self._remember(key, entry)
+
+    def _remember(self, key, entry):
+        self._memory[key] = tuple(entry)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def stats(self):
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "saved_seconds": round(self.saved_seconds, 3),
+        }
+
+
+_default_cache = None
+
+
+def get_llm_cache():
+    """Process-wide cache shared by every app in the repo."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = LLMCache()
+    return _default_cache
@@ -1,71 +1,131 @@
 import os
 from dotenv import load_dotenv
-import io
 import streamlit as st
-from PIL import Image
-import json
+import time
 import google.generativeai as genai
+from llm_cache import get_llm_cache
+from telemetry import get_telemetry, instrument_gemini
+from image_prep import ImageResultIndex, prepare_image
+from json_stream import JSONArrayStream
 load_dotenv()
 
 api_key = os.getenv("GOOGLE_API_KEY")
 genai.configure(api_key=api_key)
 
-model = genai.GenerativeModel("gemini-2.5-pro")
+model = instrument_gemini(genai.GenerativeModel("gemini-2.5-pro"))
+
+FOOD_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "food": {"type": "STRING"},
+            "approx_calories": {"type": "STRING"},
+            "recommendation": {"type": "STRING"},
+        },
+        "required": ["food", "approx_calories", "recommendation"],
+    },
+}
 
 st.title("Food Image Analyzer")
 st.markdown("Upload a food image to identify items, estimate calories, and get health recommendations using **Google Gemini Pro**.")
 
+@st.cache_resource
+def get_image_index():
+    return ImageResultIndex()
+
+@st.cache_data(show_spinner=False)
+def prepare_upload(data: bytes):
+    return prepare_image(data)
+
+def render_item(item):
+    if not isinstance(item, dict):
+        st.markdown(f"- {item}")
+        return
+    st.markdown(
+        f"**{item.get('food', '?')}** — {item.get('approx_calories', '?')} kcal  \n"
+        f"_Recommendation:_ {item.get('recommendation', '')}"
+    )
+
 uploaded_file = st.file_uploader("Upload a food image", type=["jpg", "jpeg", "png"])
 
 if uploaded_file:
     
-    image = Image.open(uploaded_file)
-    st.image(image, caption="Uploaded Image", use_column_width=True)
-
-    with st.spinner("Analyzing image using Gemini..."):
-    
-        image_bytes = io.BytesIO()
-        image.save(image_bytes, format="PNG")
-        image_bytes.seek(0)
-        prompt = (
-            "You are a nutrition expert. Look at the image and identify all visible food items. "
-            "For each item, provide:\n"
-            "1. The name of the food\n"
-            "2. Estimated calories for one serving (based on visual portion)\n"
-            "3. A short recommendation (e.g., healthier alternatives or portion advice)\n\n"
-            "Return your answer in JSON format like:\n"
-            "[{'food': '...', 'approx_calories': '...', 'recommendation': '...'}, ...]"
-        )
-
-        try:
-            response = model.generate_content(
-                [prompt, {"mime_type": "image/png", "data": image_bytes.getvalue()}],
-                generation_config={"temperature": 0.4},
-            )
-            result_text = response.text
-        except Exception as e:
-            st.error(f"Error: {e}")
-            st.stop()
-
-    st.subheader("Gemini’s Analysis")
-    st.code(result_text, language="json")
-
+    st.image(uploaded_file, caption="Uploaded Image", use_column_width=True)
+
+    prepared = prepare_upload(uploaded_file.getvalue())
+    image_key = get_image_index().canonical(prepared.phash)
+    prompt = (
+        "You are a nutrition expert. Look at the image and identify all visible food items. "
+        "For each item, provide:\n"
+        "1. The name of the food\n"
+        "2. Estimated calories for one serving (based on visual portion)\n"
+        "3. A short recommendation (e.g., healthier alternatives or portion advice)\n\n"
+        "Return a JSON array with one object per food item."
+    )
+    generation_config = {
+        "temperature": 0.4,
+        "response_mime_type": "application/json",
+        "response_schema": FOOD_SCHEMA,
+    }
+    called = []
+
+    def analyze():
+        called.append(True)
+        response = model.generate_content([prompt, prepared.part()], generation_config=generation_config, stream=True)
+        for chunk in response:
+            yield chunk.text
+
+    st.subheader(" Breakdown")
+    parser = JSONArrayStream()
+    shown = 0
+    first_item = None
+    start = time.perf_counter()
+    try:
+        with st.spinner("Analyzing image using Gemini..."):
+            for chunk in get_llm_cache().get_or_stream(
+                model.model_name,
+                prompt,
+                analyze,
+                generation_config=generation_config,
+                images=[f"phash:{image_key}"],
+            ):
+                for item in parser.feed(chunk):
+                    if first_item is None:
+                        first_item = time.perf_counter() - start
+                    render_item(item)
+                    shown += 1
+        get_image_index().record(prepared, hit=not called)
+    except Exception as e:
+        st.error(f"Error: {e}")
+        st.stop()
+    total = time.perf_counter() - start
 
     try:
-        data = json.loads(result_text)
-        st.subheader(" Breakdown")
-        for item in data:
-            st.markdown(
-                f"**{item['food']}** — {item['approx_calories']} kcal  \n"
-                f"_Recommendation:_ {item['recommendation']}"
-            )
+        data = parser.finish()
+        if isinstance(data, dict):
+            data = next((v for v in data.values() if isinstance(v, list)), [data])
+        for item in data[shown:]:
+            render_item(item)
     except Exception:
         st.warning("Could not parse structured JSON. Displaying raw response instead.")
-        st.write(result_text)
-
-st.markdown("---")
+        st.write(parser.text)
 
+    st.caption(
+        f"First item after {first_item or total:.2f}s, complete after {total:.2f}s"
+        + (f" · {parser.repairs} local JSON repair(s)" if parser.repairs else "")
+    )
+    with st.expander("Gemini’s Analysis (raw)"):
+        st.code(parser.text, language="json")
 
+with st.sidebar.expander("Image pipeline"):
+    st.json(get_image_index().stats())
 
+with st.sidebar.expander("LLM cache"):
+    st.json(get_llm_cache().stats())
 
+st.markdown("---")
 
+if get_telemetry().enabled:
+    with st.sidebar.expander("Telemetry"):
+        st.dataframe(get_telemetry().summary())
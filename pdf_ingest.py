@@ -0,0 +1,112 @@
+import io
+import os
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import faiss
+from PyPDF2 import PdfReader
+from langchain_core.documents import Document
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_classic.vectorstores import FAISS
+
+
+def iter_pdf_chunks(data: bytes, splitter, timings: dict, source="upload.pdf"):
+    """
+    Yields split chunks page by page straight from the uploaded bytes,
+    accumulating parse/split time into `timings`.
+    """
+    start = time.perf_counter()
+    reader = PdfReader(io.BytesIO(data))
+    pages = reader.pages
+    timings["parse"] += time.perf_counter() - start
+
+    for page_no in range(len(pages)):
+        start = time.perf_counter()
+        text = pages[page_no].extract_text() or ""
+        timings["parse"] += time.perf_counter() - start
+        timings["pages"] += 1
+
+        start = time.perf_counter()
+        chunks = splitter.split_documents([Document(page_content=text, metadata={"source": source, "page": page_no})])
+        timings["split"] += time.perf_counter() - start
+        yield from chunks
+
+
+def embed_pdf_batches(data: bytes, embeddings, splitter, timings: dict, batch_size=None, max_workers=None, source="upload.pdf"):
+    """
+    Streams chunks of an in-memory PDF into a bounded pool of embedding workers
+    while later pages are still being parsed. `embeddings` is a CachedEmbeddings.
+    Yields (chunks, matrix) batches in document order.
+    """
+    batch_size = batch_size or int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))
+    max_workers = max_workers or int(os.getenv("EMBEDDING_WORKERS", "4"))
+    for key in ("parse", "split", "embed"):
+        timings.setdefault(key, 0.0)
+    for key in ("pages", "chunks", "batches"):
+        timings.setdefault(key, 0)
+    embed_lock = threading.Lock()
+    # At most two batches per worker are queued so a huge PDF never sits in memory as pending work.
+    in_flight = threading.BoundedSemaphore(max_workers * 2)
+
+    def embed_batch(batch):
+        try:
+            start = time.perf_counter()
+            matrix = embeddings.embed_matrix([d.page_content for d in batch])
+            with embed_lock:
+                timings["embed"] += time.perf_counter() - start
+            return batch, matrix
+        finally:
+            in_flight.release()
+
+    futures = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        batch = []
+        for chunk in iter_pdf_chunks(data, splitter, timings, source):
+            batch.append(chunk)
+            if len(batch) >= batch_size:
+                in_flight.acquire()
+                futures.append(executor.submit(embed_batch, batch))
+                batch = []
+        if batch:
+            in_flight.acquire()
+            futures.append(executor.submit(embed_batch, batch))
+
+        for future in futures:
+            batch, matrix = future.result()
+            timings["chunks"] += len(batch)
+            timings["batches"] += 1
+            yield batch, matrix
+
+
+def ingest_pdf(data: bytes, embeddings, splitter, batch_size=None, max_workers=None, source="upload.pdf"):
+    """
+    Builds a FAISS store from an in-memory PDF using embed_pdf_batches.
+    Returns (vector_store, timings).
+    """
+    timings = {"index": 0.0}
+    wall_start = time.perf_counter()
+    index = None
+    documents = []
+    for batch, matrix in embed_pdf_batches(data, embeddings, splitter, timings, batch_size, max_workers, source):
+        start = time.perf_counter()
+        if index is None:
+            index = faiss.IndexFlatL2(matrix.shape[1])
+        index.add(np.ascontiguousarray(matrix))
+        documents.extend(batch)
+        timings["index"] += time.perf_counter() - start
+
+    if index is None:
+        raise ValueError("No text could be extracted from the PDF.")
+
+    ids = [str(uuid.uuid4()) for _ in documents]
+    store = FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=InMemoryDocstore(dict(zip(ids, documents))),
+        index_to_docstore_id=dict(enumerate(ids)),
+    )
+    timings["wall"] = time.perf_counter() - wall_start
+    return store, timings
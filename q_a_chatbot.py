@@ -4,12 +4,14 @@ import io
 import streamlit as st
 from PIL import Image
 import google.generativeai as genai
+from chat_session import ChatSession
+from telemetry import get_telemetry, instrument_gemini
 load_dotenv()
 
 api_key = os.getenv("GOOGLE_API_KEY")
 genai.configure(api_key=api_key)
 
-model = genai.GenerativeModel("gemini-2.5-pro")
+model = instrument_gemini(genai.GenerativeModel("gemini-2.5-pro"))
 
 st.set_page_config(page_title="Gemini Q&A Chatbot")
 st.title("Gemini Q&A Chatbot")
@@ -17,21 +19,29 @@ st.markdown("Ask any question — the chatbot will respond using Google's Gemini
 
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
+if "chat_session" not in st.session_state:
+    st.session_state.chat_session = ChatSession(model)
+
+for message in st.session_state.chat_history:
+    if message["role"] == "user":
+        st.chat_message("user").markdown(message["text"])
+    else:
+        st.chat_message("assistant").markdown(message["text"])
+
 user_input = st.chat_input("Type your question here...")
 
 if user_input:
     st.session_state.chat_history.append({"role": "user", "text": user_input})
+    st.chat_message("user").markdown(user_input)
 
-    with st.spinner("Gemini is thinking..."):
-        chat = model.start_chat(history=[
-            {"role": msg["role"], "parts": [msg["text"]]} for msg in st.session_state.chat_history
-        ])
-        response = chat.send_message(user_input)
-        answer = response.text
+    with st.chat_message("assistant"):
+        answer = st.write_stream(st.session_state.chat_session.send_stream(user_input))
     st.session_state.chat_history.append({"role": "model", "text": answer})
 
-for message in st.session_state.chat_history:
-    if message["role"] == "user":
-        st.chat_message("user").markdown(message["text"])
-    else:
-        st.chat_message("assistant").markdown(message["text"])
\ No newline at end of file
+if st.session_state.chat_session.metrics:
+    with st.sidebar.expander("Last turn"):
+        st.json(st.session_state.chat_session.metrics[-1])
+
+if get_telemetry().enabled:
+    with st.sidebar.expander("Telemetry"):
+        st.dataframe(get_telemetry().summary())
@@ -0,0 +1,136 @@
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from sql_engine import value_bytes
+from telemetry import span
+
+
+def normalize_sql(sql: str):
+    """Collapses whitespace outside string literals and drops a trailing semicolon."""
+    parts = re.split(r"('(?:[^']|'')*')", sql.strip().rstrip(";").strip())
+    return "".join(part if i % 2 else re.sub(r"\s+", " ", part) for i, part in enumerate(parts))
+
+
+class CachedResult:
+    """Finished result served from the cache; quacks like a fully read ResultStream."""
+
+    def __init__(self, columns, data):
+        self.columns = list(columns)
+        self._data = data
+        self.rows_fetched = len(data[0]) if data else 0
+        self.exhausted = True
+        self.cached = True
+
+    def fetch_page(self):
+        return {column: list(values) for column, values in zip(self.columns, self._data)}
+
+    def close(self):
+        pass
+
+
+class ResultCache:
+    """
+    LRU cache of complete query results, stored column-wise as tuples and bounded
+    by an approximate byte budget. Entries are tagged with the database's
+    PRAGMA data_version plus the file mtimes, so any write to the database
+    invalidates them on the next lookup.
+    """
+
+    def __init__(self, db_path: str, max_bytes=None):
+        self.db_path = db_path
+        self.max_bytes = max_bytes or int(os.getenv("SQL_RESULT_CACHE_MB", "64")) * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        uri = f"file:{os.path.abspath(db_path)}?mode=ro"
+        self._version_conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+    def data_version(self):
+        """Snapshot of the database state; take it before running a query whose result will be `put`."""
+        stamps = []
+        for suffix in ("", "-wal"):
+            try:
+                st = os.stat(self.db_path + suffix)
+                stamps.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                stamps.append(None)
+        with self._lock:
+            version = self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+        return (version, tuple(stamps))
+
+    def get(self, sql: str):
+        key = normalize_sql(sql)
+        version = self.data_version()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] != version:
+                self._drop(key)
+                self.invalidations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return CachedResult(entry[1], entry[2])
+
+    def put(self, sql: str, columns, page: dict, version):
+        """
+        Stores a complete result given as {column: [values]}, tagged with the
+        `data_version()` taken before the query ran so that a write landing while
+        it executed invalidates the entry instead of being masked by it.
+        """
+        data = tuple(tuple(page[column]) for column in columns)
+        size = sum(value_bytes(v) for values in data for v in values) + 64
+        if size > self.max_bytes:
+            return
+        key = normalize_sql(sql)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (version, tuple(columns), data, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self.bytes -= entry[3]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+        }
+
+
+def run_cached_query(engine, result_cache, query: str):
+    """
+    Opens a paginated result stream for the query on `engine` and returns
+    (stream, first_page). Results that fit in one page are stored in
+    `result_cache` and served from it until the database changes.
+    """
+    with span("sqlite", "run_sql_query") as s:
+        cached = result_cache.get(query)
+        if cached is not None:
+            s.set(cache="hit")
+            return cached, cached.fetch_page()
+        s.set(cache="miss")
+        version = result_cache.data_version()
+        stream = engine.stream(query)
+        page = stream.fetch_page()
+        if stream.exhausted and stream.columns:
+            result_cache.put(query, stream.columns, page, version)
+        return stream, page
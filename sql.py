@@ -1,28 +1,183 @@
 import sqlite3
+import random
+import argparse
+import time
+from array import array
+from datetime import date
 
-conn = sqlite3.connect("company.db")
-cursor = conn.cursor()
-
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS employees (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name TEXT,
-    department TEXT,
-    salary INTEGER
-)
-""")
-
-employees = [
-    ("Alice", "Engineering", 85000),
-    ("Bob", "HR", 60000),
-    ("Charlie", "Marketing", 75000),
-    ("Diana", "Engineering", 95000),
-    ("Evan", "Finance", 72000),
-    ("Fiona", "Marketing", 68000)
-]
-
-cursor.executemany("INSERT INTO employees (name, department, salary) VALUES (?, ?, ?)", employees)
-conn.commit()
-
-print("Database created and records inserted successfully!")
-conn.close()
\ No newline at end of file
+FIRST_NAMES = ["Alice", "Bob", "Charlie", "Diana", "Evan", "Fiona", "George", "Hannah", "Ivan", "Julia",
+               "Kevin", "Laura", "Mohan", "Nina", "Omar", "Priya", "Quinn", "Rahul", "Sara", "Tom"]
+LAST_NAMES = ["Smith", "Iyer", "Garcia", "Chen", "Khan", "Müller", "Rossi", "Patel", "Brown", "Kim",
+              "Silva", "Nguyen", "Cohen", "Singh", "Okafor", "Novak", "Sato", "Lopez", "Dubois", "Ali"]
+DEPARTMENTS = {
+    # name: (salary mean, location)
+    "Engineering": (95000, "Bengaluru"),
+    "HR": (60000, "Mumbai"),
+    "Marketing": (72000, "New York"),
+    "Finance": (80000, "London"),
+    "Sales": (65000, "Chicago"),
+    "Support": (50000, "Manila"),
+    "Legal": (105000, "London"),
+    "Operations": (62000, "Berlin"),
+    "Research": (110000, "San Francisco"),
+    "Design": (78000, "Amsterdam"),
+}
+BATCH_SIZE = 100_000
+
+
+def create_sample(db_path="company.db"):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS employees (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        department TEXT,
+        salary INTEGER
+    )
+    """)
+
+    employees = [
+        ("Alice", "Engineering", 85000),
+        ("Bob", "HR", 60000),
+        ("Charlie", "Marketing", 75000),
+        ("Diana", "Engineering", 95000),
+        ("Evan", "Finance", 72000),
+        ("Fiona", "Marketing", 68000)
+    ]
+
+    cursor.executemany("INSERT INTO employees (name, department, salary) VALUES (?, ?, ?)", employees)
+    conn.commit()
+
+    print("Database created and records inserted successfully!")
+    conn.close()
+
+
+def _insert_batched(conn, sql, rows, label):
+    """Inserts rows in large transactions and reports throughput."""
+    start = time.perf_counter()
+    total = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            with conn:
+                conn.executemany(sql, batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        with conn:
+            conn.executemany(sql, batch)
+        total += len(batch)
+    elapsed = time.perf_counter() - start
+    print(f"{label}: {total:,} rows in {elapsed:.1f}s ({total / elapsed if elapsed else 0:,.0f} rows/sec)")
+    return total
+
+
+def generate(db_path: str, employees: int, history_per_employee: int, seed: int):
+    """
+    Bulk-loads a synthetic company: departments, employees and salary history.
+    Pragmas are relaxed for loading, and indexes are built only after the data is in.
+    """
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-262144")
+    conn.executescript("""
+    DROP TABLE IF EXISTS salary_history;
+    DROP TABLE IF EXISTS employees;
+    DROP TABLE IF EXISTS departments;
+    CREATE TABLE departments (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        location TEXT,
+        budget INTEGER
+    );
+    CREATE TABLE employees (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        department TEXT,
+        salary INTEGER,
+        hire_date TEXT
+    );
+    CREATE TABLE salary_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        employee_id INTEGER NOT NULL REFERENCES employees (id),
+        salary INTEGER,
+        effective_date TEXT
+    );
+    """)
+
+    overall = time.perf_counter()
+    names = list(DEPARTMENTS)
+    weights = [3 if name in ("Engineering", "Sales", "Support") else 1 for name in names]
+    with conn:
+        conn.executemany(
+            "INSERT INTO departments (id, name, location, budget) VALUES (?, ?, ?, ?)",
+            [(i + 1, name, DEPARTMENTS[name][1], rng.randint(1, 50) * 1_000_000) for i, name in enumerate(names)],
+        )
+
+    start_day = date(2005, 1, 1).toordinal()
+    end_day = date(2025, 12, 31).toordinal()
+    # Compact per-employee state for the salary history pass (8 bytes per employee).
+    hire_days = array("i")
+    salaries = array("i")
+
+    def employee_rows():
+        for employee_id in range(1, employees + 1):
+            department = rng.choices(names, weights)[0]
+            salary = max(25000, int(rng.gauss(DEPARTMENTS[department][0], DEPARTMENTS[department][0] * 0.2)))
+            hired = rng.randint(start_day, end_day)
+            hire_days.append(hired)
+            salaries.append(salary)
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            yield employee_id, name, department, salary, date.fromordinal(hired).isoformat()
+
+    def history_rows():
+        for employee_id, (hired, salary) in enumerate(zip(hire_days, salaries), start=1):
+            current = int(salary * rng.uniform(0.6, 0.85))
+            for step in range(history_per_employee):
+                day = min(end_day, hired + step * 365)
+                yield employee_id, current, date.fromordinal(day).isoformat()
+                current = int(current * rng.uniform(1.02, 1.12))
+
+    total = _insert_batched(
+        conn, "INSERT INTO employees (id, name, department, salary, hire_date) VALUES (?, ?, ?, ?, ?)",
+        employee_rows(), "employees",
+    )
+    total += _insert_batched(
+        conn, "INSERT INTO salary_history (employee_id, salary, effective_date) VALUES (?, ?, ?)",
+        history_rows(), "salary_history",
+    )
+
+    start = time.perf_counter()
+    conn.executescript("""
+    CREATE INDEX idx_employees_department ON employees (department);
+    CREATE INDEX idx_employees_salary ON employees (salary);
+    CREATE INDEX idx_salary_history_employee ON salary_history (employee_id);
+    ANALYZE;
+    """)
+    print(f"indexes + ANALYZE: {time.perf_counter() - start:.1f}s")
+
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    elapsed = time.perf_counter() - overall
+    print(f"Loaded {total:,} rows into {db_path} in {elapsed:.1f}s ({total / elapsed:,.0f} rows/sec overall)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create the sample company database, or generate a large synthetic one.")
+    parser.add_argument("--generate", type=int, metavar="EMPLOYEES", help="Number of synthetic employees to generate")
+    parser.add_argument("--history", type=int, default=3, help="Salary history rows per employee")
+    parser.add_argument("--db", default=None, help="Database path (default: company.db, or company_large.db with --generate)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.generate:
+        generate(args.db or "company_large.db", args.generate, args.history, args.seed)
+    else:
+        create_sample(args.db or "company.db")
@@ -0,0 +1,330 @@
+import os
+import re
+import time
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from telemetry import span
+
+QUESTION_TOKEN_RE = re.compile(r"""('[^']*'|"[^"]*")|[A-Za-z0-9_.]+|[<>=!%'-]+""")
+FILLER_WORDS = {"please", "can", "you", "tell", "me", "show", "give", "list", "what", "is", "are", "the", "a", "an", "of"}
+
+
+def normalize_question(question: str):
+    """
+    Lowercases and drops filler words and plain punctuation so trivially
+    rephrased questions share a key. Operator and quote characters are kept:
+    "salary > 70000" and "salary < 70000" must not share a translation.
+    Quoted spans are kept exactly as written, since 'HR' and 'hr' are
+    different literals in SQL.
+    """
+    words = []
+    for match in QUESTION_TOKEN_RE.finditer(question):
+        word = match.group(1) or match.group(0).lower()
+        if word not in FILLER_WORDS:
+            words.append(word)
+    return " ".join(words)
+
+
+def clean_sql(text: str):
+    """Strips markdown code fences (```sql ... ```) from a model response."""
+    text = text.strip()
+    match = re.search(r"```(?:sql)?\s*(.*?)```", text, re.DOTALL | re.IGNORECASE)
+    if match:
+        text = match.group(1)
+    return text.strip("`").strip()
+
+
+class QueryTimeout(Exception):
+    pass
+
+
+def value_bytes(value):
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    return 8
+
+
+class ResultStream:
+    """
+    Pages through a query's result on a dedicated read-only connection.
+    Rows are pulled with fetchmany into a columnar buffer until the page's row
+    or byte cap is reached; a progress handler aborts any step that runs past
+    the wall-clock timeout.
+
+    An open cursor pins a read snapshot, which keeps WAL checkpoints from
+    finishing. Given a `reopen` callable, the stream therefore releases its
+    connection once it has sat idle for `idle_timeout` seconds or has read
+    `max_cursor_rows` rows on one cursor, and the next fetch_page re-runs the
+    query from where it stopped with OFFSET. Rows may shift if the database
+    changed in between.
+    """
+
+    def __init__(self, conn, query: str, page_rows=None, page_bytes=None, timeout=None, batch_size=256,
+                 reopen=None, idle_timeout=None, max_cursor_rows=None):
+        self.conn = conn
+        self.query = query.strip().rstrip(";").strip()
+        self.page_rows = page_rows or int(os.getenv("SQL_PAGE_ROWS", "1000"))
+        self.page_bytes = page_bytes or int(os.getenv("SQL_PAGE_MB", "8")) * 1024 * 1024
+        self.timeout = timeout or float(os.getenv("SQL_TIMEOUT_SECONDS", "10"))
+        self.batch_size = batch_size
+        self.reopen = reopen
+        self.idle_timeout = idle_timeout or float(os.getenv("SQL_IDLE_SECONDS", "30"))
+        self.max_cursor_rows = max_cursor_rows or int(os.getenv("SQL_MAX_LOADED_ROWS", "20000"))
+        self.rows_fetched = 0
+        self.exhausted = False
+        self.suspended = False
+        self._deadline = None
+        self._cursor_rows = 0
+        self._idle_timer = None
+        self._lock = threading.RLock()
+        self._execute(self.query)
+        self.columns = [desc[0] for desc in self.cursor.description] if self.cursor.description else []
+        self._pending = []
+        if not self.columns:
+            self.close()
+
+    def _execute(self, query: str, **attrs):
+        self.conn.set_progress_handler(self._check_deadline, 10000)
+        with span("sqlite", "execute", bytes_in=len(query), **attrs):
+            self.cursor = self._timed(lambda: self.conn.execute(query))
+        self._cursor_rows = 0
+
+    def _check_deadline(self):
+        # A non-zero return makes SQLite abort the running statement.
+        return 1 if self._deadline is not None and time.monotonic() > self._deadline else 0
+
+    def _timed(self, step):
+        self._deadline = time.monotonic() + self.timeout
+        try:
+            return step()
+        except sqlite3.OperationalError as e:
+            if "interrupted" in str(e):
+                self.close()
+                raise QueryTimeout(f"Query cancelled after {self.timeout:g}s") from e
+            raise
+        finally:
+            self._deadline = None
+
+    def fetch_page(self):
+        """Returns the next page as {column: [values]}."""
+        page = {column: [] for column in self.columns}
+        with self._lock:
+            self._cancel_idle_timer()
+            if self.exhausted:
+                return page
+            if self.suspended:
+                self._resume()
+            count, size = 0, 0
+            with span("sqlite", "fetch_page") as s:
+                while count < self.page_rows and size < self.page_bytes:
+                    batch = self._pending or self._timed(lambda: self.cursor.fetchmany(self.batch_size))
+                    self._pending = []
+                    if not batch:
+                        self.close()
+                        break
+                    for i, row in enumerate(batch):
+                        if count >= self.page_rows or size >= self.page_bytes:
+                            self._pending = batch[i:]
+                            break
+                        for column, value in zip(self.columns, row):
+                            page[column].append(value)
+                            size += value_bytes(value)
+                        count += 1
+                s.set(rows=count, bytes_out=size)
+            self.rows_fetched += count
+            self._cursor_rows += count
+            if not self.exhausted and self.reopen is not None:
+                if self._cursor_rows >= self.max_cursor_rows:
+                    self.suspend()
+                else:
+                    self._idle_timer = threading.Timer(self.idle_timeout, self.suspend)
+                    self._idle_timer.daemon = True
+                    self._idle_timer.start()
+        return page
+
+    def suspend(self):
+        """Closes the connection but keeps the position, so the read snapshot is released."""
+        with self._lock:
+            if self.exhausted or self.suspended:
+                return
+            self._cancel_idle_timer()
+            self.suspended = True
+            # Rows read ahead but not returned yet are read again on resume.
+            self._pending = []
+            self.cursor = None
+            self.conn.close()
+
+    def _resume(self):
+        self.conn = self.reopen()
+        self.suspended = False
+        try:
+            self._execute(
+                f"SELECT * FROM ({self.query}) LIMIT -1 OFFSET {self.rows_fetched}", offset=self.rows_fetched
+            )
+        except Exception:
+            self.close()
+            raise
+
+    def _cancel_idle_timer(self):
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+
+    def close(self):
+        with self._lock:
+            self._cancel_idle_timer()
+            if not self.exhausted:
+                self.exhausted = True
+                self.conn.close()
+
+
+class SQLEngine:
+    """
+    NL->SQL helper for a SQLite database: introspects the schema once (and again
+    only when PRAGMA schema_version changes), caches question->SQL translations
+    and serves queries from a small pool of read-only connections.
+    """
+
+    def __init__(self, db_path: str, pool_size=None, max_translations=512):
+        self.db_path = db_path
+        self.pool_size = pool_size or int(os.getenv("SQL_POOL_SIZE", "4"))
+        self.max_translations = max_translations
+        self.translation_hits = 0
+        self.translation_misses = 0
+        self._pool = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._schema = None
+        self._schema_version = None
+        self._translations = OrderedDict()
+        self._generation = 0
+
+    def _open(self):
+        uri = f"file:{os.path.abspath(self.db_path)}?mode=ro"
+        return sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+    @contextmanager
+    def connection(self):
+        """Borrows a pooled read-only connection."""
+        try:
+            generation, conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.pool_size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                generation, conn = self._generation, self._open()
+            else:
+                generation, conn = self._pool.get()
+        if generation != self._generation:
+            # Opened before a schema change: EXPLAIN on an old connection can miss new indexes.
+            conn.close()
+            generation, conn = self._generation, self._open()
+        try:
+            yield conn
+        finally:
+            self._pool.put((generation, conn))
+
+    def schema(self):
+        """Returns {table: {"columns", "indexes", "rows"}}, re-reading it only after a schema change."""
+        with self.connection() as conn:
+            version = conn.execute("PRAGMA schema_version").fetchone()[0]
+            if self._schema is not None and version == self._schema_version:
+                return self._schema
+
+            schema = {}
+            tables = conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+            ).fetchall()
+            for (table,) in tables:
+                columns = [
+                    {"name": c[1], "type": c[2], "pk": bool(c[5])}
+                    for c in conn.execute(f'PRAGMA table_info("{table}")')
+                ]
+                indexes = {}
+                for idx in conn.execute(f'PRAGMA index_list("{table}")'):
+                    indexes[idx[1]] = [c[2] for c in conn.execute(f'PRAGMA index_info("{idx[1]}")')]
+                rows = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+                schema[table] = {"columns": columns, "indexes": indexes, "rows": rows}
+
+        with self._lock:
+            if self._schema_version is not None and version != self._schema_version:
+                self._generation += 1
+            self._schema = schema
+            self._schema_version = version
+        return schema
+
+    def schema_prompt(self):
+        """Describes the schema for the LLM prompt."""
+        lines = []
+        for table, info in self.schema().items():
+            columns = ", ".join(f"{c['name']} {c['type']}".strip() for c in info["columns"])
+            lines.append(f"- {table} ({columns}) -- about {info['rows']} rows")
+            for name, cols in info["indexes"].items():
+                lines.append(f"  index {name} on ({', '.join(cols)})")
+        return "\n".join(lines)
+
+    def translate(self, question: str, generate):
+        """
+        Returns (sql, cached). `generate(prompt)` is only called for questions whose
+        normalized form hasn't been translated under the current schema.
+        """
+        schema_prompt = self.schema_prompt()
+        key = (self._schema_version, normalize_question(question))
+        with self._lock:
+            sql = self._translations.get(key)
+            if sql is not None:
+                self._translations.move_to_end(key)
+                self.translation_hits += 1
+                return sql, True
+
+        prompt = f"""
+        You are an expert data analyst. The SQLite database has the following tables:
+        {schema_prompt}
+        Convert the following question into a correct SQL query for SQLite.
+
+        Question: {question}
+
+        Only return the SQL query, nothing else.
+        """
+        sql = clean_sql(generate(prompt))
+        with self._lock:
+            self.translation_misses += 1
+            self._translations[key] = sql
+            while len(self._translations) > self.max_translations:
+                self._translations.popitem(last=False)
+        return sql, False
+
+    def execute(self, query: str):
+        """Runs a query on a pooled connection and returns (columns, rows)."""
+        with self.connection() as conn:
+            cursor = conn.execute(query)
+            rows = cursor.fetchall()
+            columns = [desc[0] for desc in cursor.description] if cursor.description else []
+        return columns, rows
+
+    def stream(self, query: str, **kwargs):
+        """Opens a paginated ResultStream on its own connection, so it can outlive a Streamlit rerun."""
+        conn = self._open()
+        try:
+            return ResultStream(conn, query, reopen=self._open, **kwargs)
+        except QueryTimeout:
+            raise
+        except Exception:
+            conn.close()
+            raise
+
+    def stats(self):
+        lookups = self.translation_hits + self.translation_misses
+        return {
+            "translation_hits": self.translation_hits,
+            "translation_misses": self.translation_misses,
+            "hit_rate": self.translation_hits / lookups if lookups else 0.0,
+            "schema_version": self._schema_version,
+            "pooled_connections": self._created,
+        }
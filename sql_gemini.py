@@ -1,27 +1,40 @@
 import os
 from dotenv import load_dotenv
-import sqlite3
+import time
 import streamlit as st
 from PIL import Image
 import google.generativeai as genai
+from llm_cache import get_llm_cache
+from sql_engine import SQLEngine
+from sql_guard import QueryGuard
+from result_cache import ResultCache, run_cached_query
+from telemetry import get_telemetry, instrument_gemini
 load_dotenv()
 
 api_key = os.getenv("GOOGLE_API_KEY")
 genai.configure(api_key=api_key)
 
-model = genai.GenerativeModel("gemini-2.5-pro")
+model = instrument_gemini(genai.GenerativeModel("gemini-2.5-pro"))
 
-DB_PATH = "company.db"
+DB_PATH = os.getenv("SQL_DB_PATH", "company.db")
+MAX_LOADED_ROWS = int(os.getenv("SQL_MAX_LOADED_ROWS", "20000"))
+
+@st.cache_resource
+def get_engine():
+    return SQLEngine(DB_PATH)
+
+@st.cache_resource
+def get_guard():
+    return QueryGuard(get_engine())
+
+@st.cache_resource
+def get_result_cache():
+    return ResultCache(DB_PATH)
 
 def run_sql_query(query: str):
+    """Returns (stream, first_page) for the query, or (None, error message)."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        columns = [desc[0] for desc in cursor.description] if cursor.description else []
-        conn.close()
-        return columns, rows
+        return run_cached_query(get_engine(), get_result_cache(), query)
     except Exception as e:
         return None, str(e)
 
@@ -34,27 +47,94 @@ user_question = st.text_input("Ask your question:", placeholder="e.g. What is th
 
 if st.button("Run Query") and user_question:
     with st.spinner("Generating SQL query using Gemini..."):
-        prompt = f"""
-        You are an expert data analyst. The SQLite database has a table named 'employees' with columns:
-        id, name, department, salary.
-        Convert the following question into a correct SQL query for SQLite.
-
-        Question: {user_question}
+        def generate(prompt):
+            return get_llm_cache().get_or_call(
+                model.model_name, prompt, lambda: model.generate_content(prompt).text
+            )
 
-        Only return the SQL query, nothing else.
-        """
+        sql_query, cached = get_engine().translate(user_question, generate)
+        if cached:
+            st.caption("Reused a cached translation for this question.")
 
-        response = model.generate_content(prompt)
-        sql_query = response.text.strip("`").strip()
+    previous = st.session_state.get("result_stream")
+    if previous is not None:
+        previous.close()
 
-    st.subheader("Generated SQL Query")
-    st.code(sql_query, language="sql")
+    warnings = []
+    try:
+        checked = get_guard().check(sql_query)
+        sql_query, warnings = checked.sql, checked.warnings
+    except Exception:
+        # EXPLAIN failed, so the query itself will fail and report the error below.
+        checked = None
 
     with st.spinner("Running SQL query..."):
-        columns, result = run_sql_query(sql_query)
+        start = time.perf_counter()
+        stream, result = run_sql_query(sql_query)
+        if checked is not None and stream is not None:
+            get_guard().record(checked, time.perf_counter() - start)
+
+    st.session_state.sql_query = sql_query
+    st.session_state.sql_warnings = warnings
+    st.session_state.result_stream = stream
+    st.session_state.result_page = result if stream else None
+    st.session_state.result_offset = 0
+    st.session_state.result_error = None if stream else result
 
-    if columns:
+def load_more():
+    stream = st.session_state.result_stream
+    try:
+        page = stream.fetch_page()
+    except Exception as e:
+        st.session_state.result_error = str(e)
+        return
+    buffer = st.session_state.result_page
+    for column in stream.columns:
+        buffer[column].extend(page[column])
+    # Keep memory bounded: drop the earliest rows once the loaded window is full.
+    overflow = len(buffer[stream.columns[0]]) - MAX_LOADED_ROWS
+    if overflow > 0:
+        for column in stream.columns:
+            del buffer[column][:overflow]
+        st.session_state.result_offset += overflow
+
+if "sql_query" in st.session_state:
+    st.subheader("Generated SQL Query")
+    st.code(st.session_state.sql_query, language="sql")
+    for warning in st.session_state.sql_warnings:
+        st.warning(warning)
+
+    stream = st.session_state.result_stream
+    if st.session_state.result_error:
+        st.error(f"Error executing query: {st.session_state.result_error}")
+    if stream is not None and stream.columns:
         st.subheader("Query Result")
-        st.dataframe(result, use_container_width=True)
-    else:
-        st.error(f"Error executing query: {result}")
\ No newline at end of file
+        st.dataframe(st.session_state.result_page, use_container_width=True)
+        first = st.session_state.result_offset + 1
+        st.caption(f"Showing rows {first}–{stream.rows_fetched}" + ("" if stream.exhausted else " (more available)"))
+        if not stream.exhausted:
+            st.button("Load more", on_click=load_more)
+    elif stream is not None:
+        st.success("Query executed.")
+
+with st.sidebar.expander("LLM cache"):
+    st.json(get_llm_cache().stats())
+with st.sidebar.expander("SQL engine"):
+    st.json(get_engine().stats())
+with st.sidebar.expander("Result cache"):
+    st.json(get_result_cache().stats())
+with st.sidebar.expander("Index advisor"):
+    guard = get_guard()
+    proposals = guard.suggestions()
+    if not proposals:
+        st.caption("No repeated full-scan predicates yet.")
+    for i, proposal in enumerate(proposals):
+        st.code(proposal["sql"], language="sql")
+        st.caption(f"Seen in {proposal['hits']} scanning queries")
+        if guard.admin and st.button("Create index", key=f"create_index_{i}"):
+            guard.create_index(proposal)
+            st.rerun()
+
+if get_telemetry().enabled:
+    with st.sidebar.expander("Telemetry"):
+        st.dataframe(get_telemetry().summary())
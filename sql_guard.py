@@ -0,0 +1,221 @@
+import os
+import re
+import time
+import sqlite3
+import threading
+from collections import defaultdict
+
+from sqlite_util import connect
+
+# "SCAN TABLE t AS a" (SQLite < 3.36) or "SCAN a" / "SCAN a USING [COVERING] INDEX i"; all read every row.
+SCAN_RE = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?(?: USING (?:COVERING )?INDEX \w+)?$")
+FROM_RE = re.compile(r'\b(?:FROM|JOIN)\s+"?(\w+)"?(?:\s+(?:AS\s+)?(\w+))?', re.IGNORECASE)
+QUALIFIED_RE = re.compile(r"\b(\w+)\.(\w+)\b")
+NOT_ALIASES = {
+    "where", "join", "inner", "left", "right", "full", "outer", "cross", "natural", "on", "using",
+    "group", "order", "limit", "having", "union", "except", "intersect", "window",
+}
+CLAUSE_END = r"(?=\bGROUP\s+BY\b|\bORDER\s+BY\b|\bLIMIT\b|\bHAVING\b|\bUNION\b|$)"
+WHERE_RE = re.compile(r"\bWHERE\b(.*?)" + CLAUSE_END, re.IGNORECASE | re.DOTALL)
+SELECT_RE = re.compile(r"^\s*SELECT\b(.*?)\bFROM\b", re.IGNORECASE | re.DOTALL)
+IDENT_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+def table_aliases(sql: str):
+    """Maps each table name and alias in the FROM/JOIN clauses (lowercased) to its table."""
+    aliases = {}
+    for table, alias in FROM_RE.findall(sql):
+        aliases[table.lower()] = table
+        if alias and alias.lower() not in NOT_ALIASES:
+            aliases[alias.lower()] = table
+    return aliases
+
+
+def _referenced_columns(text: str, table: str, aliases: dict, columns: dict):
+    """Columns of `table` named in `text`; qualified references only count when the qualifier is that table."""
+    found = {
+        columns[name.lower()]
+        for qualifier, name in QUALIFIED_RE.findall(text)
+        if aliases.get(qualifier.lower()) == table and name.lower() in columns
+    }
+    unqualified = QUALIFIED_RE.sub(" ", text)
+    found |= {columns[w.lower()] for w in IDENT_RE.findall(unqualified) if w.lower() in columns}
+    return found
+
+
+class GuardResult:
+    def __init__(self, sql, plan, full_scans, warnings, rewritten):
+        self.sql = sql
+        self.plan = plan
+        self.full_scans = full_scans
+        self.warnings = warnings
+        self.rewritten = rewritten
+
+    @property
+    def shape(self):
+        return " | ".join(self.plan)
+
+
+class QueryGuard:
+    """
+    Runs generated SQL through EXPLAIN QUERY PLAN before execution. Full-table
+    scans over more than `scan_row_limit` estimated rows are flagged and, for
+    queries without a LIMIT, wrapped in one. Columns used in the predicates of
+    scanned tables are counted in a query log so covering indexes can be
+    proposed (and created, in admin mode).
+    """
+
+    def __init__(self, engine, log_path=None, scan_row_limit=None, rewrite_limit=None, admin=None):
+        self.engine = engine
+        self.log_path = log_path or os.getenv("SQL_GUARD_LOG", os.path.join(".cache", "sql_guard.db"))
+        self.scan_row_limit = scan_row_limit or int(os.getenv("SQL_SCAN_ROW_LIMIT", "100000"))
+        self.rewrite_limit = rewrite_limit or int(os.getenv("SQL_REWRITE_LIMIT", "1000"))
+        self.admin = admin if admin is not None else os.getenv("SQL_ADMIN", "0") == "1"
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.log_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with connect(self.log_path) as conn:
+            conn.executescript("""
+            CREATE TABLE IF NOT EXISTS queries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                sql TEXT,
+                shape TEXT,
+                full_scan INTEGER,
+                latency_ms REAL,
+                created_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS predicate_columns (
+                table_name TEXT,
+                column_name TEXT,
+                selected TEXT,
+                hits INTEGER,
+                PRIMARY KEY (table_name, column_name)
+            );
+            """)
+
+    def check(self, sql: str):
+        """Explains `sql` and returns a GuardResult; `result.sql` is what should be executed."""
+        sql = sql.strip().rstrip(";").strip()
+        # Refresh the schema first so connections predating a schema change are recycled.
+        schema = self.engine.schema()
+        with self.engine.connection() as conn:
+            plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+
+        aliases = table_aliases(sql)
+        full_scans, warnings = [], []
+        for detail in plan:
+            match = SCAN_RE.match(detail)
+            if not match:
+                continue
+            # Newer SQLite reports the alias rather than the table name.
+            table = aliases.get(match.group(1).lower(), match.group(1))
+            if table not in schema:
+                continue
+            rows = schema[table]["rows"]
+            if rows > self.scan_row_limit:
+                full_scans.append((table, rows))
+                warnings.append(f"Full scan of {table} (~{rows:,} rows).")
+            self._record_predicates(sql, table, schema[table], aliases)
+
+        rewritten = False
+        if full_scans and sql.lower().startswith("select") and not re.search(r"\bLIMIT\b", sql, re.IGNORECASE):
+            sql = f"SELECT * FROM ({sql}) LIMIT {self.rewrite_limit}"
+            rewritten = True
+            warnings.append(f"Added LIMIT {self.rewrite_limit} to bound the result.")
+        return GuardResult(sql, plan, full_scans, warnings, rewritten)
+
+    def _record_predicates(self, sql: str, table: str, info: dict, aliases: dict):
+        columns = {c["name"].lower(): c["name"] for c in info["columns"]}
+        where = WHERE_RE.search(sql)
+        if not where:
+            return
+        predicate = _referenced_columns(where.group(1), table, aliases, columns)
+        select = SELECT_RE.search(sql)
+        selected = sorted(_referenced_columns(select.group(1), table, aliases, columns) - predicate) if select else []
+        with self._lock, connect(self.log_path) as conn:
+            for column in predicate:
+                conn.execute(
+                    "INSERT INTO predicate_columns (table_name, column_name, selected, hits) VALUES (?, ?, ?, 1) "
+                    "ON CONFLICT (table_name, column_name) DO UPDATE SET hits = hits + 1, selected = excluded.selected",
+                    (table, column, ",".join(selected)),
+                )
+
+    def record(self, result: GuardResult, latency_seconds: float):
+        with self._lock, connect(self.log_path) as conn:
+            conn.execute(
+                "INSERT INTO queries (sql, shape, full_scan, latency_ms, created_at) VALUES (?, ?, ?, ?, ?)",
+                (result.sql, result.shape, int(bool(result.full_scans)), latency_seconds * 1000, time.time()),
+            )
+
+    def suggestions(self, min_hits=3):
+        """Proposes covering indexes for predicate columns that keep showing up in full scans."""
+        schema = self.engine.schema()
+        with connect(self.log_path) as conn:
+            rows = conn.execute(
+                "SELECT table_name, column_name, selected, hits FROM predicate_columns WHERE hits >= ? ORDER BY hits DESC",
+                (min_hits,),
+            ).fetchall()
+        proposals = []
+        for table, column, selected, hits in rows:
+            if table not in schema:
+                continue
+            if any(cols and cols[0] == column for cols in schema[table]["indexes"].values()):
+                continue
+            columns = [column] + [c for c in selected.split(",") if c][:3]
+            name = f"idx_{table}_{'_'.join(columns)}"
+            proposals.append({
+                "table": table,
+                "columns": columns,
+                "hits": hits,
+                "sql": f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({", ".join(columns)})',
+            })
+        return proposals
+
+    def create_index(self, proposal: dict):
+        """Creates a proposed index. Only allowed in admin mode (SQL_ADMIN=1)."""
+        if not self.admin:
+            raise PermissionError("Index creation requires admin mode (SQL_ADMIN=1).")
+        conn = sqlite3.connect(self.engine.db_path)
+        try:
+            conn.execute(proposal["sql"])
+            conn.execute(f'ANALYZE "{proposal["table"]}"')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def report(self):
+        """Plan shapes over the query log with their counts and latency percentiles."""
+        with connect(self.log_path) as conn:
+            rows = conn.execute("SELECT shape, full_scan, latency_ms FROM queries WHERE latency_ms IS NOT NULL").fetchall()
+        by_shape = defaultdict(list)
+        scans = {}
+        for shape, full_scan, latency in rows:
+            by_shape[shape].append(latency)
+            scans[shape] = bool(full_scan)
+        report = []
+        for shape, latencies in by_shape.items():
+            latencies.sort()
+            report.append({
+                "shape": shape,
+                "full_scan": scans[shape],
+                "count": len(latencies),
+                "p50_ms": round(latencies[len(latencies) // 2], 2),
+                "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2),
+                "max_ms": round(latencies[-1], 2),
+            })
+        return sorted(report, key=lambda r: r["p95_ms"], reverse=True)
+
+
+if __name__ == "__main__":
+    import json
+    import argparse
+    from sql_engine import SQLEngine
+
+    parser = argparse.ArgumentParser(description="Report plan shapes and latencies from the SQL guard log.")
+    parser.add_argument("--db", default=os.getenv("SQL_DB_PATH", "company.db"))
+    parser.add_argument("--min-hits", type=int, default=3)
+    args = parser.parse_args()
+
+    guard = QueryGuard(SQLEngine(args.db))
+    print(json.dumps({"plans": guard.report(), "index_suggestions": guard.suggestions(args.min_hits)}, indent=2))
@@ -0,0 +1,18 @@
+import sqlite3
+from contextlib import contextmanager
+
+
+@contextmanager
+def connect(path: str, timeout=10):
+    """
+    Short-lived WAL connection for the on-disk caches and logs: the block is
+    committed (or rolled back) and the connection closed, so no file handle
+    outlives the call.
+    """
+    conn = sqlite3.connect(path, timeout=timeout)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            yield conn
+    finally:
+        conn.close()
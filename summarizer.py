@@ -0,0 +1,61 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+CHUNK_SIZE = 8000
+REDUCE_CHAR_LIMIT = 24000
+
+
+def _group_for_reduce(summaries, limit: int):
+    """
+    Splits consecutive summaries into groups whose joined length stays under
+    `limit`. Every group holds at least two summaries so each level shrinks.
+    """
+    groups, current, size = [], [], 0
+    for summary in summaries:
+        if len(current) >= 2 and size + len(summary) > limit:
+            groups.append(current)
+            current, size = [], 0
+        current.append(summary)
+        size += len(summary) + 2
+    if len(current) == 1 and groups:
+        groups[-1].append(current[0])
+    elif current:
+        groups.append(current)
+    return groups
+
+
+def summarize_text(text: str, model, chunk_size=CHUNK_SIZE, max_concurrency=None, reduce_limit=None):
+    """
+    Map-reduce summary of a long transcript. Chunks are summarized concurrently
+    (at most `max_concurrency` requests in flight), then partial summaries are
+    combined as a tree until they fit a single final combine call. Order is preserved.
+    """
+    max_concurrency = max_concurrency or int(os.getenv("SUMMARIZER_CONCURRENCY", "8"))
+    reduce_limit = reduce_limit or int(os.getenv("SUMMARIZER_REDUCE_CHARS", str(REDUCE_CHAR_LIMIT)))
+    chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+
+    def summarize_chunk(i, chunk):
+        prompt = f"Summarize this part of a YouTube transcript (part {i+1}):\n\n{chunk}"
+        response = model.generate_content(prompt, generation_config={"temperature": 0.5})
+        return response.text
+
+    def combine_group(group):
+        prompt = (
+            "Combine the following consecutive partial summaries of a YouTube transcript into one "
+            "summary, keeping their order and all key details:\n\n" + "\n\n".join(group)
+        )
+        response = model.generate_content(prompt, generation_config={"temperature": 0.4})
+        return response.text
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        summaries = list(executor.map(summarize_chunk, range(len(chunks)), chunks))
+        while len(summaries) > 1 and sum(len(s) + 2 for s in summaries) > reduce_limit:
+            summaries = list(executor.map(combine_group, _group_for_reduce(summaries, reduce_limit)))
+
+    combined_prompt = (
+        "Combine and refine the following partial summaries into a single coherent summary "
+        "that captures the main points, key details, and tone of the original video:\n\n"
+        + "\n\n".join(summaries)
+    )
+    final_response = model.generate_content(combined_prompt, generation_config={"temperature": 0.4})
+    return final_response.text
@@ -0,0 +1,372 @@
+import os
+import re
+import sys
+import json
+import time
+import threading
+from collections import deque
+
+
+class Span:
+    """
+    Times one call. Attributes such as bytes_in/bytes_out, tokens_in/tokens_out
+    and cache ("hit", "miss", "bypass", ...) are attached with `set`; the record
+    is emitted when the block exits, with the error if it raised. A streaming
+    generator closed early by its consumer is marked cancelled, not failed.
+    """
+
+    __slots__ = ("telemetry", "kind", "name", "attrs", "start")
+
+    def __init__(self, telemetry, kind, name, attrs):
+        self.telemetry = telemetry
+        self.kind = kind
+        self.name = name
+        self.attrs = attrs
+        self.start = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record = {
+            "ts": round(time.time(), 3),
+            "kind": self.kind,
+            "name": self.name,
+            "duration_ms": round((time.perf_counter() - self.start) * 1000, 3),
+        }
+        record.update(self.attrs)
+        if exc_type is GeneratorExit:
+            record["cancelled"] = True
+        elif exc_type is not None:
+            record["error"] = f"{exc_type.__name__}: {exc}"
+        self.telemetry.emit(record)
+        return False
+
+
+class _NoopSpan:
+    """Returned when telemetry is disabled: entering, exiting and setting attributes do nothing."""
+
+    __slots__ = ()
+    start = None
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class JSONLSink:
+    """Appends span records to a JSONL file, rotating it to .1, .2, ... once it passes `max_bytes`."""
+
+    def __init__(self, path=None, max_bytes=None, backups=None):
+        self.path = path or os.getenv("TELEMETRY_PATH", os.path.join(".cache", "telemetry.jsonl"))
+        self.max_bytes = max_bytes or int(float(os.getenv("TELEMETRY_MAX_MB", "10")) * 1024 * 1024)
+        self.backups = backups if backups is not None else int(os.getenv("TELEMETRY_BACKUPS", "3"))
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+
+    def write(self, record):
+        line = json.dumps(record, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            if self._size + len(line) > self.max_bytes and self._size:
+                self._rotate()
+            self._file.write(line)
+            self._file.flush()
+            self._size += len(line)
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._size = 0
+
+
+def percentile(values, q):
+    """Nearest-rank percentile (q in 0..1) of `values`, or None when there are none."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def peak_rss_mb():
+    """Process-wide peak resident set size in MB, or None where the resource module is unavailable."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere.
+    return round(peak / 1e6 if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def summarize(records):
+    """One row per (kind, name): call count, errors, latency percentiles, bytes, tokens and cache hit rate."""
+    groups = {}
+    for record in records:
+        groups.setdefault((record["kind"], record["name"]), []).append(record)
+    rows = []
+    for (kind, name), group in sorted(groups.items()):
+        durations = [r["duration_ms"] for r in group]
+        cached = [r["cache"] for r in group if "cache" in r]
+        row = {
+            "kind": kind,
+            "name": name,
+            "calls": len(group),
+            "errors": sum(1 for r in group if "error" in r),
+            "p50_ms": round(percentile(durations, 0.5), 1),
+            "p95_ms": round(percentile(durations, 0.95), 1),
+            "total_ms": round(sum(durations), 1),
+        }
+        cancelled = sum(1 for r in group if r.get("cancelled"))
+        if cancelled:
+            row["cancelled"] = cancelled
+        for field in ("bytes_in", "bytes_out", "tokens_in", "tokens_out"):
+            total = sum(r.get(field) or 0 for r in group)
+            if total:
+                row[field] = total
+        if cached:
+            row["cache_hit_rate"] = round(sum(1 for c in cached if c == "hit") / len(cached), 3)
+        rows.append(row)
+    return rows
+
+
+class Telemetry:
+    """
+    Span factory for LLM, embedding, SQLite and HTTP calls. Records go to a
+    rotating JSONL sink and a bounded in-memory window for the debug panel.
+    Disabled unless TELEMETRY_ENABLED=1. While disabled, `span` hands out a
+    shared no-op and the wrappers below return the wrapped objects unchanged.
+    """
+
+    def __init__(self, enabled=None, sink=None, window=2000):
+        self.enabled = enabled if enabled is not None else os.getenv("TELEMETRY_ENABLED", "0") == "1"
+        self.sink = sink if sink is not None or not self.enabled else JSONLSink()
+        self.recent = deque(maxlen=window)
+
+    def span(self, kind, name, **attrs):
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, kind, name, attrs)
+
+    def emit(self, record):
+        self.recent.append(record)
+        if self.sink is not None:
+            try:
+                self.sink.write(record)
+            except OSError:
+                pass
+
+    def summary(self):
+        return summarize(list(self.recent))
+
+
+_default_telemetry = None
+
+
+def get_telemetry():
+    """Process-wide telemetry shared by every app in the repo."""
+    global _default_telemetry
+    if _default_telemetry is None:
+        _default_telemetry = Telemetry()
+    return _default_telemetry
+
+
+def span(kind, name, **attrs):
+    return get_telemetry().span(kind, name, **attrs)
+
+
+def payload_bytes(contents):
+    """Approximate request size of a prompt: text as UTF-8 plus inline image data."""
+    if isinstance(contents, str):
+        return len(contents.encode("utf-8"))
+    if isinstance(contents, (bytes, bytearray)):
+        return len(contents)
+    if isinstance(contents, dict):
+        return payload_bytes(contents.get("data") or contents.get("text") or contents.get("content") or "")
+    if isinstance(contents, (list, tuple)):
+        return sum(payload_bytes(c) for c in contents)
+    return 0
+
+
+def _text_bytes(response):
+    try:
+        return len((response.text or "").encode("utf-8"))
+    except (AttributeError, ValueError):
+        # Gemini raises ValueError on .text for chunks without a text part.
+        return 0
+
+
+def _gemini_tokens(response):
+    usage = getattr(response, "usage_metadata", None)
+    if not usage:
+        return {}
+    return {
+        "tokens_in": getattr(usage, "prompt_token_count", None),
+        "tokens_out": getattr(usage, "candidates_token_count", None),
+    }
+
+
+class _InstrumentedGemini:
+    """Proxy for a GenerativeModel or ChatSession that records a span per request."""
+
+    def __init__(self, target, telemetry, model_name, method):
+        self._target = target
+        self._telemetry = telemetry
+        self._model_name = model_name
+        self._method = method
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+    def _call(self, contents, *args, **kwargs):
+        method = getattr(self._target, self._method)
+        if kwargs.get("stream"):
+            return self._stream(method, contents, args, kwargs)
+        with self._telemetry.span("llm", self._model_name, provider="gemini", bytes_in=payload_bytes(contents)) as s:
+            response = method(contents, *args, **kwargs)
+            s.set(bytes_out=_text_bytes(response), **_gemini_tokens(response))
+        return response
+
+    def _stream(self, method, contents, args, kwargs):
+        with self._telemetry.span(
+            "llm", self._model_name, provider="gemini", stream=True, bytes_in=payload_bytes(contents)
+        ) as s:
+            size, last = 0, None
+            for chunk in method(contents, *args, **kwargs):
+                if last is None:
+                    s.set(ttft_ms=round((time.perf_counter() - s.start) * 1000, 3))
+                size += _text_bytes(chunk)
+                last = chunk
+                yield chunk
+            s.set(bytes_out=size, **_gemini_tokens(last))
+
+
+class InstrumentedModel(_InstrumentedGemini):
+    def __init__(self, model, telemetry):
+        super().__init__(model, telemetry, model.model_name, "generate_content")
+
+    def generate_content(self, contents, *args, **kwargs):
+        return self._call(contents, *args, **kwargs)
+
+    def start_chat(self, *args, **kwargs):
+        return InstrumentedChat(self._target.start_chat(*args, **kwargs), self._telemetry, self._model_name)
+
+
+class InstrumentedChat(_InstrumentedGemini):
+    def __init__(self, chat, telemetry, model_name):
+        super().__init__(chat, telemetry, model_name, "send_message")
+
+    def send_message(self, content, *args, **kwargs):
+        return self._call(content, *args, **kwargs)
+
+
+def instrument_gemini(model, telemetry=None):
+    """Wraps a GenerativeModel so generate_content and chat messages are traced; a no-op when disabled."""
+    telemetry = telemetry or get_telemetry()
+    if not telemetry.enabled:
+        return model
+    return InstrumentedModel(model, telemetry)
+
+
+_callback_class = None
+
+
+def _langchain_callback_class():
+    global _callback_class
+    if _callback_class is None:
+        from langchain_core.callbacks import BaseCallbackHandler
+
+        class TelemetryCallback(BaseCallbackHandler):
+            """Turns LangChain chat model start/end/error events into spans."""
+
+            def __init__(self, telemetry):
+                self.telemetry = telemetry
+                self._open = {}
+
+            def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+                params = kwargs.get("invocation_params") or {}
+                name = params.get("model_name") or params.get("model") or (serialized or {}).get("name", "chat")
+                size = sum(payload_bytes(m.content) for batch in messages for m in batch)
+                self._open[run_id] = (time.perf_counter(), name, size)
+
+            def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+                params = kwargs.get("invocation_params") or {}
+                name = params.get("model_name") or params.get("model") or (serialized or {}).get("name", "llm")
+                self._open[run_id] = (time.perf_counter(), name, payload_bytes(prompts))
+
+            def _finish(self, run_id, **attrs):
+                start, name, size = self._open.pop(run_id, (None, "llm", 0))
+                if start is None:
+                    return
+                record = {
+                    "ts": round(time.time(), 3),
+                    "kind": "llm",
+                    "name": name,
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                    "provider": "langchain",
+                    "bytes_in": size,
+                }
+                record.update(attrs)
+                self.telemetry.emit(record)
+
+            def on_llm_end(self, response, *, run_id, **kwargs):
+                usage = (response.llm_output or {}).get("token_usage") or {}
+                text = "".join(g.text for batch in response.generations for g in batch)
+                self._finish(
+                    run_id,
+                    bytes_out=len(text.encode("utf-8")),
+                    tokens_in=usage.get("prompt_tokens"),
+                    tokens_out=usage.get("completion_tokens"),
+                )
+
+            def on_llm_error(self, error, *, run_id, **kwargs):
+                self._finish(run_id, error=f"{type(error).__name__}: {error}")
+
+        _callback_class = TelemetryCallback
+    return _callback_class
+
+
+def langchain_callbacks(telemetry=None):
+    """Callbacks for LangChain models (e.g. ChatGroq(callbacks=...)); empty when disabled."""
+    telemetry = telemetry or get_telemetry()
+    if not telemetry.enabled:
+        return []
+    return [_langchain_callback_class()(telemetry)]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarize a telemetry JSONL file, including rotated backups.")
+    parser.add_argument("path", nargs="?", default=os.getenv("TELEMETRY_PATH", os.path.join(".cache", "telemetry.jsonl")))
+    args = parser.parse_args()
+
+    # The live file and its rotated backups (name.1, name.2, ...) only.
+    directory, base = os.path.split(args.path)
+    backup_re = re.compile(re.escape(base) + r"(\.\d+)?")
+    records = []
+    for candidate in sorted(p for p in os.listdir(directory or ".") if backup_re.fullmatch(p)):
+        with open(os.path.join(directory, candidate), encoding="utf-8") as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    for row in summarize(records):
+        print(json.dumps(row))
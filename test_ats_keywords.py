@@ -0,0 +1,21 @@
+from ats_keywords import ResumeIndex, missing_keywords
+
+
+def test_multi_word_alias_matches_abbreviation_in_resume():
+    jd = "Experience with Google Cloud and Amazon Web Services is required."
+    assert missing_keywords(jd, "Deployed services on GCP and AWS.") == []
+
+
+def test_abbreviation_in_jd_matches_multi_word_alias_in_resume():
+    jd = "Must know GCP, AWS and CI/CD."
+    assert missing_keywords(jd, ResumeIndex("Google Cloud, Amazon Web Services, CI CD pipelines")) == []
+
+
+def test_missing_skill_is_reported_by_canonical_name():
+    assert "gcp" in missing_keywords("Hands-on Google Cloud experience.", "Worked on Azure.")
+
+
+def test_ambiguous_short_words_are_not_skills():
+    jd = "Send your CV. You will go above and beyond in our R&D team."
+    missing = missing_keywords(jd, "Python developer.")
+    assert not {"go", "r", "computer vision"} & set(missing)
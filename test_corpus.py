@@ -0,0 +1,63 @@
+import io
+
+import numpy as np
+import pytest
+from PyPDF2 import PdfWriter
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_classic.text_splitter import RecursiveCharacterTextSplitter
+
+import corpus as corpus_module
+from corpus import Corpus
+
+
+class FakeEmbeddings(Embeddings):
+    """Embeds text as a 4-dim bag of letter counts."""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+    def embed_query(self, text):
+        return [float(text.count(c)) for c in "abcd"]
+
+
+def fake_batches(texts):
+    def embed_pdf_batches(data, embeddings, splitter, timings, source="upload.pdf"):
+        batch = [Document(page_content=t, metadata={"source": source, "page": 0}) for t in texts]
+        yield batch, np.asarray([FakeEmbeddings().embed_query(t) for t in texts], dtype=np.float32)
+    return embed_pdf_batches
+
+
+def blank_pdf():
+    writer = PdfWriter()
+    writer.add_blank_page(width=72, height=72)
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def test_pdf_without_text_is_rejected(tmp_path):
+    corpus = Corpus(str(tmp_path))
+    with pytest.raises(ValueError):
+        corpus.add_pdf("blank.pdf", blank_pdf(), FakeEmbeddings(), RecursiveCharacterTextSplitter(chunk_size=100))
+    assert corpus.documents() == []
+    assert corpus.index is None
+    assert not (tmp_path / "index.faiss").exists()
+
+
+def test_existing_store_searches_the_current_index(tmp_path, monkeypatch):
+    corpus = Corpus(str(tmp_path))
+    embeddings = FakeEmbeddings()
+    monkeypatch.setattr(corpus_module, "embed_pdf_batches", fake_batches(["aaaa", "bbbb"]))
+    first = corpus.add_pdf("first.pdf", b"first", embeddings, splitter=None)
+    store = corpus.as_vector_store(embeddings)
+    before = corpus.index
+
+    monkeypatch.setattr(corpus_module, "embed_pdf_batches", fake_batches(["cccc"]))
+    corpus.add_pdf("second.pdf", b"second", embeddings, splitter=None)
+    assert corpus.index is not before and before.ntotal == 2
+    assert store.similarity_search("cccc", k=1)[0].page_content == "cccc"
+
+    corpus.remove(first)
+    assert [d.page_content for d in store.similarity_search("aaaa", k=3)] == ["cccc"]
+    assert Corpus(str(tmp_path)).index.ntotal == 1
@@ -0,0 +1,61 @@
+import pytest
+
+import crew_tools
+from crew_tools import LLMTool, make_fake_openai_handler, serve_stub
+from llm_cache import LLMCache
+
+
+@pytest.fixture
+def openai_legacy():
+    openai = pytest.importorskip("openai")
+    if not hasattr(openai, "ChatCompletion") or openai.__version__.startswith("1."):
+        pytest.skip("LLMTool needs the legacy (0.x) openai API")
+    return openai
+
+
+@pytest.fixture
+def fake_server():
+    requests = []
+    handler = make_fake_openai_handler(tokens=5, ttft=0.0, rate=1000.0)
+
+    class CountingHandler(handler):
+        def do_POST(self):
+            requests.append(self.path)
+            super().do_POST()
+
+    server = serve_stub(CountingHandler)
+    yield f"http://127.0.0.1:{server.server_port}/v1", requests
+    server.shutdown()
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.delenv("LLM_CACHE_DISABLED", raising=False)
+    cache = LLMCache(path=str(tmp_path / "llm_cache.db"))
+    monkeypatch.setattr(crew_tools, "get_llm_cache", lambda: cache)
+    return cache
+
+
+def test_stream_parses_deltas_until_done(openai_legacy, fake_server, cache):
+    api_base, requests = fake_server
+    tool = LLMTool(api_key="fake", api_base=api_base)
+    chunks = list(tool.stream("Write something."))
+    assert chunks == [f"word{i} " for i in range(5)]
+    assert len(requests) == 1
+
+
+def test_second_stream_is_replayed_from_cache(openai_legacy, fake_server, cache):
+    api_base, requests = fake_server
+    tool = LLMTool(api_key="fake", api_base=api_base)
+    first = "".join(tool.stream("Write something."))
+    second = list(tool.stream("Write something."))
+    assert second == [first]
+    assert len(requests) == 1
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_run_uses_the_same_server(openai_legacy, fake_server, cache):
+    api_base, requests = fake_server
+    result = LLMTool(api_key="fake", api_base=api_base).run("Write something.")
+    assert result.ok
+    assert result.output == "".join(f"word{i} " for i in range(5))
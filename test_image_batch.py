@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+from image_batch import iter_folder_images, resolve_folder
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "root"
+    outside = tmp_path / "outside"
+    (root / "photos").mkdir(parents=True)
+    outside.mkdir()
+    (root / "photos" / "a.jpg").write_bytes(b"inside")
+    (outside / "secret.jpg").write_bytes(b"outside")
+    return root, outside
+
+
+def test_folder_inside_root_resolves(tree):
+    root, _ = tree
+    assert resolve_folder("photos", str(root)) == os.path.realpath(root / "photos")
+    assert resolve_folder(str(root / "photos"), str(root)) == os.path.realpath(root / "photos")
+
+
+def test_dotdot_is_rejected(tree):
+    root, _ = tree
+    assert resolve_folder("../outside", str(root)) is None
+    assert resolve_folder("photos/../../outside", str(root)) is None
+
+
+def test_absolute_path_outside_root_is_rejected(tree):
+    root, outside = tree
+    assert resolve_folder(str(outside), str(root)) is None
+    assert resolve_folder("/", str(root)) is None
+
+
+def test_symlinked_directory_out_of_root_is_rejected(tree):
+    root, outside = tree
+    os.symlink(outside, root / "escape", target_is_directory=True)
+    assert resolve_folder("escape", str(root)) is None
+
+
+def test_symlinked_file_out_of_root_is_skipped(tree):
+    root, outside = tree
+    os.symlink(outside / "secret.jpg", root / "photos" / "b.jpg")
+    folder = resolve_folder("photos", str(root))
+    assert list(iter_folder_images(folder, str(root))) == [("a.jpg", b"inside")]
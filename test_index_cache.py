@@ -0,0 +1,25 @@
+import os
+
+from index_cache import IndexCache
+
+
+class FakeStore:
+    def save_local(self, path):
+        os.makedirs(path)
+        with open(os.path.join(path, "index.faiss"), "w") as f:
+            f.write("x" * 100)
+
+
+def test_memory_hit_refreshes_disk_entry(tmp_path):
+    cache = IndexCache(cache_dir=str(tmp_path), max_disk_bytes=250)
+    cache.get_or_build("old", FakeStore, None)
+    cache.get_or_build("new", FakeStore, None)
+    os.utime(tmp_path / "old", (1, 1))
+    os.utime(tmp_path / "new", (2, 2))
+
+    assert cache.get_or_build("old", FakeStore, None) is not None
+    assert cache.memory_hits == 1
+    cache.get_or_build("third", FakeStore, None)
+
+    # "new" was least recently used once "old" got its memory hit.
+    assert sorted(os.listdir(tmp_path)) == ["old", "third"]
@@ -0,0 +1,65 @@
+import sqlite3
+
+from result_cache import ResultCache, run_cached_query
+from sql_engine import SQLEngine
+
+
+def make_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(5)])
+    conn.commit()
+    conn.close()
+
+
+class WriteAfterFetch:
+    """Engine whose streams let another connection commit a write right after the page is read."""
+
+    def __init__(self, engine, db_path):
+        self.engine = engine
+        self.db_path = db_path
+
+    def stream(self, query, **kwargs):
+        stream = self.engine.stream(query, **kwargs)
+        fetch_page = stream.fetch_page
+
+        def fetch_then_write():
+            page = fetch_page()
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("INSERT INTO t VALUES (99)")
+            conn.commit()
+            conn.close()
+            return page
+
+        stream.fetch_page = fetch_then_write
+        return stream
+
+
+def test_write_during_query_invalidates_cached_result(tmp_path):
+    db_path = str(tmp_path / "data.db")
+    make_db(db_path)
+    engine = SQLEngine(db_path)
+    cache = ResultCache(db_path)
+
+    stream, page = run_cached_query(WriteAfterFetch(engine, db_path), cache, "SELECT count(*) AS n FROM t")
+    stream.close()
+    assert page == {"n": [5]}
+
+    stream, page = run_cached_query(engine, cache, "SELECT count(*) AS n FROM t")
+    stream.close()
+    assert page == {"n": [6]}
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_unchanged_database_is_served_from_cache(tmp_path):
+    db_path = str(tmp_path / "data.db")
+    make_db(db_path)
+    engine = SQLEngine(db_path)
+    cache = ResultCache(db_path)
+
+    for _ in range(2):
+        stream, page = run_cached_query(engine, cache, "SELECT count(*) AS n FROM t")
+        stream.close()
+    assert page == {"n": [5]}
+    assert cache.stats()["hits"] == 1
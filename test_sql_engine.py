@@ -0,0 +1,73 @@
+import sqlite3
+import time
+
+from sql_engine import SQLEngine, normalize_question
+
+
+def test_rephrasings_share_a_key():
+    assert normalize_question("Show me the average salary?") == normalize_question("average   Salary")
+
+
+def test_operators_are_part_of_the_key():
+    questions = [
+        "employees with salary > 70000",
+        "employees with salary < 70000",
+        "employees with salary >= 70000",
+        "employees with salary != 70000",
+        "employees with salary = 70000",
+    ]
+    assert len({normalize_question(q) for q in questions}) == len(questions)
+
+
+def test_quotes_and_signs_are_part_of_the_key():
+    assert normalize_question("names like 'a%'") != normalize_question("names like a")
+    assert normalize_question("balance below -500") != normalize_question("balance below 500")
+
+
+def test_quoted_literals_keep_their_case():
+    assert normalize_question("employees in 'HR'") != normalize_question("employees in 'hr'")
+    assert normalize_question("Employees IN 'HR'") == normalize_question("employees in 'HR'")
+    assert normalize_question('name = "Ann  Lee"') != normalize_question('name = "ann lee"')
+
+
+def make_db(path, rows=50):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(rows)])
+    conn.commit()
+    conn.close()
+
+
+def read_all(stream):
+    rows = []
+    while not stream.exhausted:
+        rows.extend(stream.fetch_page()["x"])
+    return rows
+
+
+def test_stream_resumes_after_max_cursor_rows(tmp_path):
+    db_path = str(tmp_path / "data.db")
+    make_db(db_path)
+    stream = SQLEngine(db_path).stream("SELECT x FROM t ORDER BY x;", page_rows=7, max_cursor_rows=10)
+    first = stream.fetch_page()["x"]
+    second = stream.fetch_page()["x"]
+    assert stream.suspended
+    assert first + second + read_all(stream) == list(range(50))
+
+
+def test_idle_stream_releases_its_snapshot(tmp_path):
+    db_path = str(tmp_path / "data.db")
+    make_db(db_path)
+    stream = SQLEngine(db_path).stream("SELECT x FROM t ORDER BY x", page_rows=10, idle_timeout=0.05)
+    assert stream.fetch_page()["x"] == list(range(10))
+    time.sleep(0.3)
+    assert stream.suspended
+
+    writer = sqlite3.connect(db_path)
+    writer.execute("INSERT INTO t VALUES (50)")
+    writer.commit()
+    busy, _, _ = writer.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    writer.close()
+    assert busy == 0
+    assert read_all(stream) == list(range(10, 51))
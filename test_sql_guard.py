@@ -0,0 +1,41 @@
+import contextlib
+import io
+
+import pytest
+
+import sql
+from sql_engine import SQLEngine
+from sql_guard import QueryGuard
+
+
+@pytest.fixture
+def guard(tmp_path):
+    db_path = str(tmp_path / "company.db")
+    with contextlib.redirect_stdout(io.StringIO()):
+        sql.generate(db_path, employees=200, history_per_employee=3, seed=7)
+    return QueryGuard(SQLEngine(db_path), log_path=str(tmp_path / "guard.db"), scan_row_limit=100)
+
+
+def test_aliased_scan_is_flagged_and_bounded(guard):
+    result = guard.check("SELECT * FROM salary_history sh WHERE sh.salary > 100000")
+    assert [table for table, _ in result.full_scans] == ["salary_history"]
+    assert result.rewritten and result.sql.endswith(f"LIMIT {guard.rewrite_limit}")
+
+
+def test_join_scan_records_predicates_of_the_scanned_table(guard):
+    query = (
+        "SELECT e.name, sh.salary FROM employees AS e JOIN salary_history sh ON sh.employee_id = e.id "
+        "WHERE e.hire_date > '2020-01-01' AND sh.salary > 100000"
+    )
+    for _ in range(3):
+        result = guard.check(query)
+    assert "employees" in [table for table, _ in result.full_scans]
+    proposals = {p["table"]: p["columns"] for p in guard.suggestions()}
+    # sh.salary belongs to salary_history, which is searched by index, so only hire_date is proposed.
+    assert proposals == {"employees": ["hire_date", "name"]}
+
+
+def test_covering_index_scan_counts_as_full_scan(guard):
+    result = guard.check("SELECT department, count(*) FROM employees e GROUP BY e.department")
+    assert any(detail.endswith("USING COVERING INDEX idx_employees_department") for detail in result.plan)
+    assert [table for table, _ in result.full_scans] == ["employees"]
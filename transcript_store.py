@@ -0,0 +1,128 @@
+import os
+import json
+import time
+import zlib
+import threading
+
+from youtube_transcript_api import YouTubeTranscriptApi
+
+from sqlite_util import connect
+
+
+class TranscriptStore:
+    """
+    On-disk cache of YouTube transcripts keyed by (video id, languages). The raw
+    segment list, timestamps included, is stored as zlib-compressed JSON rows in
+    SQLite. Entries expire after a TTL and the least recently used ones are
+    evicted once the store grows past its size cap.
+    """
+
+    def __init__(self, path=None, ttl_seconds=None, max_bytes=None):
+        self.path = path or os.getenv("TRANSCRIPT_CACHE_PATH", os.path.join(".cache", "transcripts.db"))
+        if ttl_seconds is None:
+            ttl_seconds = float(os.getenv("TRANSCRIPT_CACHE_TTL_HOURS", "168")) * 3600
+        if max_bytes is None:
+            max_bytes = int(os.getenv("TRANSCRIPT_CACHE_MAX_MB", "100")) * 1024 * 1024
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with connect(self.path) as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS transcripts (
+                video_id TEXT NOT NULL,
+                languages TEXT NOT NULL,
+                segments BLOB NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (video_id, languages)
+            )
+            """)
+
+    def get_segments(self, video_id: str, languages=("en",)):
+        """
+        Returns the transcript as a list of {"text", "start", "duration"} dicts,
+        fetching from YouTube only on a miss or after the entry expired.
+        """
+        key = ",".join(languages)
+        now = time.time()
+        with connect(self.path) as conn:
+            row = conn.execute(
+                "SELECT segments, fetched_at FROM transcripts WHERE video_id = ? AND languages = ?",
+                (video_id, key),
+            ).fetchone()
+            if row and now - row[1] < self.ttl_seconds:
+                conn.execute(
+                    "UPDATE transcripts SET accessed_at = ? WHERE video_id = ? AND languages = ?",
+                    (now, video_id, key),
+                )
+                with self._lock:
+                    self.hits += 1
+                return [
+                    {"start": start, "duration": duration, "text": text}
+                    for start, duration, text in json.loads(zlib.decompress(row[0]))
+                ]
+
+        with self._lock:
+            self.misses += 1
+        raw = YouTubeTranscriptApi.get_transcript(video_id, languages=list(languages))
+        segments = [
+            {"start": seg.get("start", 0.0), "duration": seg.get("duration", 0.0), "text": seg["text"]}
+            for seg in raw
+        ]
+        packed = [[s["start"], s["duration"], s["text"]] for s in segments]
+        blob = zlib.compress(json.dumps(packed, separators=(",", ":")).encode("utf-8"), 6)
+        with connect(self.path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO transcripts (video_id, languages, segments, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (video_id, key, blob, now, now),
+            )
+            self._evict(conn, now)
+        return segments
+
+    def _evict(self, conn, now: float):
+        conn.execute("DELETE FROM transcripts WHERE fetched_at < ?", (now - self.ttl_seconds,))
+        total = conn.execute("SELECT COALESCE(SUM(LENGTH(segments)), 0) FROM transcripts").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for video_id, key, size in conn.execute(
+            "SELECT video_id, languages, LENGTH(segments) FROM transcripts ORDER BY accessed_at"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM transcripts WHERE video_id = ? AND languages = ?", (video_id, key))
+            total -= size
+
+    def stats(self):
+        with connect(self.path) as conn:
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(segments)), 0) FROM transcripts"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+def join_segments(segments, separator=" "):
+    return separator.join(seg["text"] for seg in segments)
+
+
+_default_store = None
+
+
+def get_transcript_store():
+    """Process-wide store shared by the YouTube apps."""
+    global _default_store
+    if _default_store is None:
+        _default_store = TranscriptStore()
+    return _default_store
@@ -1,55 +1,11 @@
 import streamlit as st
-import os
-import re
-from youtube_transcript_api import YouTubeTranscriptApi
 from dotenv import load_dotenv
+from llm_cache import get_llm_cache
+from crew_tools import LLMTool, YouTubeTranscriptTool
+from agent_runtime import Graph, Memo
+from telemetry import get_telemetry
 load_dotenv()
-class ToolResult:
-    def __init__(self, ok, output=None, error=None):
-        self.ok = ok
-        self.output = output
-        self.error = error
-
-class YouTubeTranscriptTool:
-    def run(self, video_url):
-
-        video_id = self.extract_id(video_url)
-        if not video_id:
-            return ToolResult(False, error="Invalid YouTube URL or ID")
-
-        try:
-            data = YouTubeTranscriptApi.get_transcript(video_id)
-            text = "\n".join([seg['text'] for seg in data])
-            return ToolResult(True, text)
-        except Exception as e:
-            return ToolResult(False, error=str(e))
-
-    def extract_id(self, url):
-        match = re.search(r'(?:v=|\/)([A-Za-z0-9_-]{11})', url)
-        return match.group(1) if match else None
-
-class LLMTool:
-    def __init__(self, model="gpt-4o-mini", api_key=None):
-        import openai
-        self.openai = openai
-        self.model = model
-        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-
-    def run(self, prompt):
-        if not self.api_key:
-            return ToolResult(False, error="Missing OPENAI_API_KEY")
-        try:
-            self.openai.api_key = self.api_key
-            response = self.openai.ChatCompletion.create(
-                model=self.model,
-                messages=[{"role": "system", "content": "Write an engaging blog post."}, {"role": "user", "content": prompt}],
-            )
-            text = response["choices"][0]["message"]["content"]
-            return ToolResult(True, text)
-        except Exception as e:
-            return ToolResult(False, error=str(e))
-        
-        
+
 class TranscriptAgent:
     def __init__(self, tool):
         self.tool = tool
@@ -61,38 +17,86 @@ class BlogWriterAgent:
     def __init__(self, tool):
         self.tool = tool
 
+    def prompt(self, transcript):
+        return f"Create a blog post summarizing the following transcript:\n{transcript}\nMake it engaging, clear, and well-structured."
+
     def run(self, transcript):
-        prompt = f"Create a blog post summarizing the following transcript:\n{transcript}\nMake it engaging, clear, and well-structured."
-        return self.tool.run(prompt)
+        return self.tool.run(self.prompt(transcript))
+
+    def stream(self, transcript):
+        return self.tool.stream(self.prompt(transcript))
+
+@st.cache_resource
+def get_memo():
+    return Memo()
+
+def build_graph(urls, model, stream=False):
+    """One transcript node per video (fetched concurrently) feeding a single blog node."""
+    transcript_agent = TranscriptAgent(YouTubeTranscriptTool())
+    blog_agent = BlogWriterAgent(LLMTool(model=model, system_prompt="Write an engaging blog post."))
+    graph = Graph(memo=get_memo())
+    transcripts = [
+        graph.add(f"transcript_{i + 1}", transcript_agent.run, deps=[f"url_{i + 1}"], retries=2)
+        for i in range(len(urls))
+    ]
+    graph.add(
+        "blog",
+        lambda *texts: (blog_agent.stream if stream else blog_agent.run)("\n\n---\n\n".join(texts)),
+        deps=transcripts,
+        retries=1,
+        memo_key=f"blog:{model}",
+        stream=stream,
+    )
+    return graph
 
 st.set_page_config(page_title="YouTube to Blog", layout="centered")
 st.title("YouTube → Blog Generator")
 
-url = st.text_input("Enter YouTube URL:")
+urls_text = st.text_area("Enter YouTube URL(s), one per line:", height=100)
 model = st.selectbox("Choose Model", ["gpt-4o-mini", "gpt-4o"])
+stream = st.checkbox("Stream the blog as it is written", value=True)
 
 if st.button("Generate Blog"):
-    if not url:
+    urls = [u.strip() for u in urls_text.splitlines() if u.strip()]
+    if not urls:
         st.error("Please enter a YouTube URL.")
     else:
-        st.info("Fetching transcript...")
-        transcript_tool = YouTubeTranscriptTool()
-        llm_tool = LLMTool(model=model)
-        transcript_agent = TranscriptAgent(transcript_tool)
-        blog_agent = BlogWriterAgent(llm_tool)
-
-        t_result = transcript_agent.run(url)
-        if not t_result.ok:
-            st.error(f"Transcript error: {t_result.error}")
-        else:
-            st.success("Transcript fetched.")
-            st.text_area("Transcript (first 1000 chars)", t_result.output[:1000], height=150)
-
-            st.info("Generating blog...")
-            w_result = blog_agent.run(t_result.output)
-            if not w_result.ok:
-                st.error(f"Blog generation failed: {w_result.error}")
-            else:
-                st.success("Blog generated!")
-                st.markdown(w_result.output)
-                st.download_button("Download Blog", w_result.output, file_name="blog.md", mime="text/markdown")
+        st.info(f"Fetching {len(urls)} transcript(s)...")
+
+        def on_node_done(metric, output):
+            if metric.name.startswith("transcript_"):
+                if metric.status == "ok":
+                    st.success(f"Transcript {metric.name.split('_')[1]} fetched.")
+                    st.text_area(f"Transcript {metric.name.split('_')[1]} (first 1000 chars)", output[:1000], height=150)
+                else:
+                    st.error(f"Transcript error ({urls[int(metric.name.split('_')[1]) - 1]}): {metric.error}")
+            elif metric.status == "failed":
+                st.error(f"Blog generation failed: {metric.error}")
+
+        live = {"attempt": 0, "text": ""}
+
+        def on_chunk(metric, chunk):
+            if metric.attempts != live["attempt"]:
+                live.update(attempt=metric.attempts, text="", placeholder=live.get("placeholder") or st.empty())
+            live["text"] += chunk
+            live["placeholder"].markdown(live["text"])
+
+        graph = build_graph(urls, model, stream)
+        with st.spinner("Generating blog..."):
+            run = graph.run({f"url_{i + 1}": url for i, url in enumerate(urls)}, callback=on_node_done, on_chunk=on_chunk)
+        st.session_state.last_run = run.report()
+        if run.metrics["blog"].status == "ok":
+            st.success("Blog generated!")
+            if "placeholder" not in live:
+                st.markdown(run.outputs["blog"])
+            st.download_button("Download Blog", run.outputs["blog"], file_name="blog.md", mime="text/markdown")
+
+with st.sidebar.expander("Last run"):
+    st.dataframe(st.session_state.get("last_run", []))
+
+with st.sidebar.expander("LLM cache"):
+    st.json(get_llm_cache().stats())
+
+if get_telemetry().enabled:
+    with st.sidebar.expander("Telemetry"):
+        st.dataframe(get_telemetry().summary())
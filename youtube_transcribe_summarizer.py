@@ -3,16 +3,19 @@ from dotenv import load_dotenv
 import io
 import streamlit as st
 from PIL import Image
-from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound
+from youtube_transcript_api import TranscriptsDisabled, NoTranscriptFound
 import json
 import google.generativeai as genai
 import re
+from transcript_store import get_transcript_store, join_segments
+from summarizer import summarize_text as map_reduce_summarize
+from telemetry import get_telemetry, instrument_gemini
 load_dotenv()
 
 api_key = os.getenv("GOOGLE_API_KEY")
 genai.configure(api_key=api_key)
 
-model = genai.GenerativeModel("gemini-2.5-pro")
+model = instrument_gemini(genai.GenerativeModel("gemini-2.5-pro"))
 
 def extract_video_id(url: str):
     """
@@ -26,35 +29,20 @@ def extract_video_id(url: str):
 
 def get_youtube_transcript(video_id: str):
     """
-    Fetch transcript text using YouTubeTranscriptApi.
+    Fetch transcript text using YouTubeTranscriptApi, served from the shared on-disk transcript store when cached.
     """
     try:
-        transcript = YouTubeTranscriptApi.get_transcript(video_id, languages=["en"])
-        text = " ".join([t["text"] for t in transcript])
-        return text
+        segments = get_transcript_store().get_segments(video_id, languages=("en",))
+        return join_segments(segments, " ")
     except (TranscriptsDisabled, NoTranscriptFound):
         return None
 
 def summarize_text(text: str):
     """
-    Summarizes long transcripts by chunking them and then asking Gemini for a combined summary.
+    Summarizes long transcripts by summarizing chunks concurrently and then combining
+    the partial summaries (as a tree for long videos) into a single summary with Gemini.
     """
-    CHUNK_SIZE = 8000
-    chunks = [text[i:i+CHUNK_SIZE] for i in range(0, len(text), CHUNK_SIZE)]
-    summaries = []
-
-    for i, chunk in enumerate(chunks):
-        prompt = f"Summarize this part of a YouTube transcript (part {i+1}):\n\n{chunk}"
-        response = model.generate_content(prompt, generation_config={"temperature": 0.5})
-        summaries.append(response.text)
-
-    combined_prompt = (
-        "Combine and refine the following partial summaries into a single coherent summary "
-        "that captures the main points, key details, and tone of the original video:\n\n"
-        + "\n\n".join(summaries)
-    )
-    final_response = model.generate_content(combined_prompt, generation_config={"temperature": 0.4})
-    return final_response.text
+    return map_reduce_summarize(text, model)
 
 
 st.set_page_config(page_title="YouTube Video Summarizer", layout="centered")
@@ -84,4 +72,8 @@ if url:
             st.subheader("Video Summary")
             st.write(summary)
 
-st.markdown("---")
\ No newline at end of file
+st.markdown("---")
+
+if get_telemetry().enabled:
+    with st.sidebar.expander("Telemetry"):
+        st.dataframe(get_telemetry().summary())